@@ -0,0 +1,294 @@
+#----------------------------------------------------------------------------#
+# JSON API, version 1.
+#
+# Mirrors the read routes under /api/v1 with the same dicts the HTML views
+# render, the same query budgets and the same ETag / Last-Modified validators.
+# ?fields=a,b keeps only those keys of every returned venue, artist or show.
+# Bodies are encoded with orjson when it is installed and gzipped when the
+# client accepts it.
+#----------------------------------------------------------------------------#
+
+import datetime
+import gzip
+import json
+
+from flask import Blueprint, abort, current_app, request
+
+import availability
+import conditional
+import queries
+import search
+import shows as show_pages
+from database import read_only
+from forms import GENRE_CHOICES
+from pagination import encode_cursor, page_args
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+blueprint = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(repr(value))
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_default,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def sparse(resource):
+    # The resource with only the keys asked for in ?fields=, if any
+    fields = request.args.get('fields')
+    if not fields:
+        return resource
+    keep = set(fields.split(','))
+    return {key: value for key, value in resource.items() if key in keep}
+
+
+def representation(etag):
+    # Sparse fieldsets are different representations of the same rows
+    fields = request.args.get('fields')
+    return conditional.make_etag(etag, fields) if fields else etag
+
+
+def respond(data, status=200):
+    body = dumps(data)
+    response = current_app.response_class(
+        body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if request.accept_encodings['gzip'] and \
+            len(body) >= current_app.config['API_GZIP_MIN_SIZE']:
+        response.set_data(gzip.compress(
+            body, current_app.config['API_GZIP_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def respond_page(page, items):
+    # Not modified, or one page of a listing with its cursors
+    not_modified = conditional.validate(
+        representation(page.etag), page.last_modified)
+    if not_modified is not None:
+        return not_modified
+    return respond({
+        'data': items,
+        'limit': page.limit,
+        'prev_cursor': page.prev_cursor,
+        'next_cursor': page.next_cursor,
+    })
+
+
+def respond_detail(detail):
+    if detail is None:
+        abort(404)
+    not_modified = conditional.validate(
+        representation(detail.etag), detail.last_modified)
+    if not_modified is not None:
+        return not_modified
+    return respond(sparse(detail.data))
+
+
+@blueprint.errorhandler(400)
+@blueprint.errorhandler(404)
+@blueprint.errorhandler(415)
+def error(e):
+    return respond({'error': e.code, 'message': e.description}, e.code)
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues')
+@read_only
+def venues():
+    page = queries.venue_areas(**page_args())
+    return respond_page(page, [
+        dict(area, venues=[sparse(venue) for venue in area['venues']])
+        for area in page.items])
+
+
+@blueprint.route('/venues/search')
+@read_only
+def search_venues():
+    response = search.search_venues(
+        request.args.get('search_term', ''),
+        limit=current_app.config['PAGE_SIZE'])
+    return respond(dict(response, data=[
+        sparse(venue) for venue in response['data']]))
+
+
+@blueprint.route('/venues/<int:venue_id>')
+@read_only
+def show_venue(venue_id):
+    return respond_detail(queries.venue_detail(venue_id))
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@blueprint.route('/artists')
+@read_only
+def artists():
+    page = queries.artist_listing(**page_args())
+    return respond_page(page, [sparse(artist) for artist in page.items])
+
+
+@blueprint.route('/artists/search')
+@read_only
+def search_artists():
+    response = search.search_artists(
+        request.args.get('search_term', ''),
+        limit=current_app.config['PAGE_SIZE'])
+    return respond(dict(response, data=[
+        sparse(artist) for artist in response['data']]))
+
+
+@blueprint.route('/artists/<int:artist_id>')
+@read_only
+def show_artist(artist_id):
+    return respond_detail(queries.artist_detail(artist_id))
+
+
+#  Shows and genres
+#  ----------------------------------------------------------------
+
+@blueprint.route('/shows')
+@read_only
+def shows():
+    page = queries.show_listing(**page_args())
+    return respond_page(page, [sparse(show) for show in page.items])
+
+
+@blueprint.route('/shows/batch', methods=['POST'])
+def create_show_batch():
+    # {"shows": [{"artist_id": 4, "venue_id": 1, "start_time": "2026-11-01
+    # 20:00:00", "duration_minutes": 90}, ...]}: all created, or none and
+    # the errors of every rejected row, numbered from 1
+    if not request.is_json:
+        abort(415)
+    body = request.get_json(silent=True)
+    records = body.get('shows') if isinstance(body, dict) else None
+    if not isinstance(records, list):
+        abort(400, 'Expected a JSON object with a "shows" list')
+    rejects = []
+    created = show_pages.create_batch(
+        list(enumerate(records, start=1)), rejects)
+    if rejects:
+        return respond({
+            'error': 422,
+            'message': 'No show was created',
+            'rejects': [{'row': number, 'errors': errors}
+                        for number, errors in rejects],
+        }, 422)
+    return respond({'created': created}, 201)
+
+
+@blueprint.route('/genres/<genre>')
+@read_only
+def browse_genre(genre):
+    if genre not in dict(GENRE_CHOICES):
+        abort(404)
+    browse = queries.genre_browse(genre, limit=current_app.config['PAGE_SIZE'])
+    return respond({
+        'genre': genre,
+        'venues': [sparse(venue) for venue in browse['venues']],
+        'artists': [sparse(artist) for artist in browse['artists']],
+        'upcoming_shows': [sparse(show) for show in browse['upcoming_shows']],
+    })
+
+
+#  Availability
+#  ----------------------------------------------------------------
+
+def date_arg(name):
+    try:
+        return datetime.datetime.strptime(request.args[name], '%Y-%m-%d')
+    except (KeyError, ValueError):
+        abort(400)
+
+
+def date_range():
+    # [start, end) covering ?date=D, or ?start=D1&end=D2 with both days
+    # included, up to AVAILABILITY_MAX_DAYS long
+    if 'date' in request.args:
+        start = last = date_arg('date')
+    else:
+        start = date_arg('start')
+        last = date_arg('end') if 'end' in request.args else start
+    end = last + datetime.timedelta(days=1)
+    days = (end - start).days
+    if not 0 < days <= current_app.config['AVAILABILITY_MAX_DAYS']:
+        abort(400)
+    return start, end
+
+
+def min_length():
+    # Slots shorter than ?min_minutes= are left out
+    minutes = request.args.get('min_minutes', 0, type=int)
+    return datetime.timedelta(minutes=max(0, minutes))
+
+
+def respond_availability(venues, start, end, **extra):
+    return respond(dict(extra, start=start, end=end,
+                        venues=[sparse(venue) for venue in venues]))
+
+
+@blueprint.route('/venues/<int:venue_id>/availability')
+@read_only
+def show_availability(venue_id):
+    start, end = date_range()
+    venues = availability.venue_availability(
+        [venue_id], start, end, min_length())
+    if not venues:
+        abort(404)
+    return respond_availability(venues, start, end)
+
+
+@blueprint.route('/availability')
+@read_only
+def search_availability():
+    # The venues of a city (?city=&state=) or a set of venues
+    # (?venue_id=1&venue_id=2), each with its open slots over the dates;
+    # ?free=true keeps only the venues free for all of them
+    start, end = date_range()
+    max_limit = current_app.config['MAX_PAGE_SIZE']
+    limit = max(1, min(request.args.get('limit', max_limit, type=int),
+                       max_limit))
+    paging = {}
+    if 'city' in request.args:
+        # A page of the city's venues by name; pass next_cursor back as
+        # ?after= for the next one
+        if 'state' not in request.args:
+            abort(400)
+        venue_ids = queries.city_venue_ids(
+            request.args['city'], request.args['state'],
+            request.args.get('after'), limit)
+        venues = availability.venue_availability(
+            venue_ids, start, end, min_length())
+        paging = {'limit': limit, 'next_cursor': None}
+        if len(venues) > limit:
+            venues = venues[:limit]
+            paging['next_cursor'] = encode_cursor(
+                [venues[-1]['venue_name'], venues[-1]['venue_id']])
+    else:
+        venue_ids = request.args.getlist('venue_id', type=int)
+        if not venue_ids or len(venue_ids) > max_limit:
+            abort(400)
+        venues = availability.venue_availability(
+            venue_ids, start, end, min_length())
+    # Filtered after paging, so a page of a city may hold fewer venues
+    if request.args.get('free') in ('1', 'true'):
+        venues = [venue for venue in venues if venue['free']]
+    return respond_availability(venues, start, end, **paging)
+
+
+def init_app(app):
+    app.register_blueprint(blueprint)
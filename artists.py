@@ -0,0 +1,197 @@
+#----------------------------------------------------------------------------#
+# Artist pages: listing, search, detail, create and edit.
+#----------------------------------------------------------------------------#
+
+from flask import (Blueprint, current_app, flash, redirect, render_template,
+                   request, url_for)
+
+import cache
+import conditional
+import database
+import queries
+import search
+from forms import ArtistForm
+from models import db, Artist, Genre
+from pagination import page_args
+
+blueprint = Blueprint('artists', __name__)
+
+
+@blueprint.route('/artists')
+@database.read_only
+def artists():
+    # Get one page of artists ordered by name
+    page = queries.artist_listing(**page_args())
+    # Answer 304 from the row timestamps before rendering anything
+    not_modified = conditional.validate(page.etag, page.last_modified)
+    if not_modified is not None:
+        return not_modified
+    return render_template('pages/artists.html', artists=page.items, page=page)
+
+
+@blueprint.route('/artists/search', methods=['POST'])
+@database.read_only
+def search_artists():
+    # Get the matching artists and their count from one indexed query
+    search_term = request.form.get('search_term', '')
+    response = search.search_artists(
+        search_term, limit=current_app.config['PAGE_SIZE'])
+    return render_template('pages/search_artists.html', results=response,
+                           search_term=request.form.get('search_term', ''))
+
+
+@blueprint.route('/artists/<int:artist_id>')
+@database.read_only
+@cache.cached_page('artist', 'artist_id')
+def show_artist(artist_id):
+    # shows the artist page with the given artist_id
+
+    # Get the artist and all of its shows in one query
+    detail = queries.artist_detail(artist_id)
+
+    # Check if the object exixt or not
+    if not detail:
+        return render_template('errors/404.html')
+
+    # Answer 304 from the row timestamps before rendering anything
+    not_modified = conditional.validate(detail.etag, detail.last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    # Cache the page until its first upcoming show starts
+    upcoming = detail.data['upcoming_shows']
+    cache.store_page(until=upcoming[0]['start_time'] if upcoming else None)
+    return render_template('pages/show_artist.html', artist=detail.data)
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@blueprint.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@blueprint.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    # called upon submitting the new artist listing form
+    # TODO: insert form data as a new Venue record in the db, instead
+    # TODO: modify data to be the data object returned from db insertion
+
+     # Form Validation 
+    form = ArtistForm()
+    if not form.validate():
+     for fieldName, errorMessages in form.errors.items():
+       flash( errorMessages)
+     return redirect(url_for('.create_artist_form'))
+
+    # Get the required data to create a new artist
+    name = request.form['name']
+    city = request.form['city']
+    state = request.form['state']
+    phone = request.form['phone']
+    genres = Genre.lookup(request.form.getlist('genres'))
+    facebook_link = request.form['facebook_link']
+    website_link = request.form['website_link']
+    image_link = request.form['image_link']
+    seeking_venue = True if 'seeking_venue' in request.form else False
+    seeking_description = request.form['seeking_description']
+    # Add data to artist model
+    new_Artist = Artist(
+        name=name,
+        city=city,
+        state=state,
+        phone=phone,
+        genres=genres,
+        facebook_link=facebook_link,
+        image_link=image_link,
+        website_link=website_link,
+        seeking_venue=seeking_venue,
+        seeking_description=seeking_description,
+    )
+    # on successful db insert, flash success
+    try:
+        # Add the new artist to db
+        Artist.create(new_Artist)
+        flash('Artist ' + request.form['name'] + ' was successfully listed!')
+        # TODO: on unsuccessful db insert, flash an error instead.
+    except BaseException:
+        db.session.rollback()
+        flash(
+            'An error occurred. Artist ' +
+            request.form['name'] +
+            ' could not be listed.')
+    finally:
+        db.session.close()
+    return render_template('pages/home.html')
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    # Get the artist by the given id
+    artist = Artist.query.get(artist_id)
+    # Fill artist data in the form
+    form = ArtistForm()
+    form.name.data = artist.name
+    form.city.data = artist.city
+    form.state.data = artist.state
+    form.phone.data = artist.phone
+    form.genres.data = [genre.name for genre in artist.genres]
+    form.facebook_link.data = artist.facebook_link
+    form.image_link.data = artist.image_link
+    form.website_link.data = artist.website_link
+    form.seeking_venue.data = artist.seeking_venue
+    form.seeking_description.data = artist.seeking_description
+
+    # TODO: populate form with fields from artist with ID <artist_id>
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    # TODO: take values from the form submitted, and update existing
+    # artist record with ID <artist_id> using the new attributes
+
+    # Form Validation 
+    form = ArtistForm()
+    if not form.validate():
+      for fieldName, errorMessages in form.errors.items():
+       flash(errorMessages)
+      return redirect(url_for('.edit_artist', artist_id=artist_id))
+    
+    # Get the artist by the given id
+    artist = Artist.query.get(artist_id)
+    # Update artist data
+    try:
+        artist.name = request.form['name']
+        artist.city = request.form['city']
+        artist.state = request.form['state']
+        artist.phone = request.form['phone']
+        artist.facebook_link = request.form['facebook_link']
+        artist.website_link = request.form['website_link']
+        artist.image_link = request.form['image_link']
+        artist.genres = Genre.lookup(request.form.getlist('genres'))
+        artist.seeking_venue = True if 'seeking_venue' in request.form else False
+        artist.seeking_description = request.form['seeking_description']
+
+        Artist.update(artist)
+        # Drop the cached pages that show this artist
+        cache.invalidate(venue_ids=queries.artist_venue_ids(artist_id),
+                         artist_ids=[artist_id])
+        flash(" {} info was updated successfully!".format(artist.name))
+    except BaseException:
+        db.session.rollback()
+        flash(" {} info wasn't updated successfully!".format(artist.name))
+    finally:
+        db.session.close()
+
+    return redirect(url_for('.show_artist', artist_id=artist_id))
+
+
+def init_app(app):
+    app.register_blueprint(blueprint)
@@ -0,0 +1,169 @@
+#----------------------------------------------------------------------------#
+# Fingerprinted, precompressed static assets.
+#
+# `flask assets-build` copies every file of static/ to ASSETS_DIR under a name
+# carrying a hash of its content (css/main.css -> css/main.1f2e3d4c5b6a.css),
+# writes gzip and, with the brotli package installed, brotli variants of the
+# text files next to it, and records the names in manifest.json. URLs inside
+# stylesheets are rewritten to the fingerprinted files they point at.
+#
+# Templates link assets with {{ asset_url('css/main.css') }}. Built assets
+# are served from /assets/ with the best encoding the client accepts and a
+# one-year immutable Cache-Control: a changed file gets a new URL. Without a
+# build, asset_url() falls back to the plain /static/ URL.
+#----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+import click
+from flask import (abort, current_app, request, safe_join, send_from_directory,
+                   url_for)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = 'manifest.json'
+
+# Encodings served when the client accepts them, best first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Only text compresses well enough to be worth a variant
+COMPRESSIBLE = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html',
+                '.eot', '.ttf', '.otf'}
+MIN_COMPRESS_SIZE = 1024
+
+ONE_YEAR = 365 * 24 * 60 * 60
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def fingerprint(name, content):
+    stem, ext = posixpath.splitext(name)
+    return '{}.{}{}'.format(stem, hashlib.sha256(content).hexdigest()[:12], ext)
+
+
+def rewrite_css(name, content, manifest):
+    # Point url(...) references at the fingerprinted files; references to
+    # files that are not in the build are left alone
+    directory = posixpath.dirname(name)
+
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r'^(?:[a-z]+:|/|#)', url):
+            return match.group(0)
+        path, suffix = re.match(r'^([^?#]*)(.*)$', url).groups()
+        target = posixpath.normpath(posixpath.join(directory, path))
+        if target not in manifest:
+            return match.group(0)
+        url = posixpath.relpath(manifest[target], directory) + suffix
+        return 'url({0}{1}{0})'.format(quote, url)
+
+    return CSS_URL.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def write_variants(path, content):
+    if posixpath.splitext(path)[1] not in COMPRESSIBLE or \
+            len(content) < MIN_COMPRESS_SIZE:
+        return
+    # mtime=0 keeps the gzip bytes the same from build to build
+    with open(path + '.gz', 'wb') as out:
+        out.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as out:
+            out.write(brotli.compress(content))
+
+
+def build(static_folder, output):
+    # Fingerprint every static file into output; stylesheets last so their
+    # url() references can be rewritten. Returns the manifest.
+    names = []
+    for root, dirs, files in os.walk(static_folder):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(root, filename)
+            names.append(os.path.relpath(path, static_folder).replace(
+                os.sep, '/'))
+    names.sort(key=lambda name: (name.endswith('.css'), name))
+
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    manifest = {}
+    for name in names:
+        with open(os.path.join(static_folder, name), 'rb') as source:
+            content = source.read()
+        if name.endswith('.css'):
+            content = rewrite_css(name, content, manifest)
+        manifest[name] = fingerprint(name, content)
+        path = os.path.join(output, manifest[name])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as out:
+            out.write(content)
+        write_variants(path, content)
+
+    with open(os.path.join(output, MANIFEST), 'w') as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST)) as source:
+            return json.load(source)
+    except (IOError, ValueError):
+        return {}
+
+
+def asset_url(filename):
+    manifest = current_app.extensions['asset_manifest']
+    if filename in manifest:
+        return url_for('asset', filename=manifest[filename])
+    return url_for('static', filename=filename)
+
+
+def init_app(app):
+    output = app.config['ASSETS_DIR']
+    app.extensions['asset_manifest'] = load_manifest(output)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.route('/assets/<path:filename>')
+    def asset(filename):
+        if filename == MANIFEST:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or \
+            'application/octet-stream'
+        accepted = request.accept_encodings
+        encoding = None
+        for name, suffix in ENCODINGS:
+            path = safe_join(output, filename + suffix)
+            if accepted[name] and path and os.path.isfile(path):
+                encoding = name
+                filename += suffix
+                break
+        response = send_from_directory(output, filename, mimetype=mimetype,
+                                       cache_timeout=ONE_YEAR)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = \
+            'public, max-age={}, immutable'.format(ONE_YEAR)
+        return response
+
+    @app.cli.command('assets-build')
+    def assets_build_command():
+        """Fingerprint and precompress the static files."""
+        manifest = build(app.static_folder, output)
+        app.extensions['asset_manifest'] = manifest
+        click.echo('{} assets written to {}{}'.format(
+            len(manifest), output,
+            '' if brotli else ' (no brotli variants: pip install brotli)'))
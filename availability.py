@@ -0,0 +1,73 @@
+#----------------------------------------------------------------------------#
+# Venue availability.
+#
+# The shows of every venue asked about are loaded with one range query and
+# kept per venue as sorted, merged [start, end) intervals. Open slots and "is
+# the venue free" questions are then answered by bisecting those intervals,
+# with no further queries however long the date range is.
+#----------------------------------------------------------------------------#
+
+import bisect
+import datetime
+from itertools import groupby
+
+import queries
+
+
+class Bookings(object):
+    # The booked time of one venue as disjoint intervals sorted by start, so
+    # the ends are sorted too and both can be bisected
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                # Overlapping or touching: extend the previous interval
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def is_free(self, start, end):
+        # No booking shares time with [start, end)
+        index = bisect.bisect_right(self.ends, start)
+        return index == len(self.starts) or self.starts[index] >= end
+
+    def open_slots(self, start, end, min_length=datetime.timedelta(0)):
+        # The free [start, end) intervals within the range, in order
+        slots = []
+        cursor = start
+        index = bisect.bisect_right(self.ends, start)
+        while index < len(self.starts) and self.starts[index] < end:
+            if self.starts[index] > cursor:
+                slots.append((cursor, self.starts[index]))
+            cursor = max(cursor, self.ends[index])
+            index += 1
+        if cursor < end:
+            slots.append((cursor, end))
+        return [(slot_start, slot_end) for slot_start, slot_end in slots
+                if slot_end - slot_start >= min_length]
+
+
+def venue_availability(venue_ids, start, end, min_length=None):
+    # Query budget: 1 statement. One dict per venue of venue_ids (a list or a
+    # subquery) with its open slots in [start, end) and whether it is free
+    # for all of it.
+    min_length = min_length or datetime.timedelta(0)
+    rows = queries.availability_query(venue_ids, start, end)
+    availability = []
+    for (venue_id, venue_name), shows in groupby(
+            rows, key=lambda row: (row.venue_id, row.venue_name)):
+        bookings = Bookings(
+            queries.booking(show)[:2] for show in shows
+            if show.start_time is not None)
+        availability.append({
+            'venue_id': venue_id,
+            'venue_name': venue_name,
+            'free': bookings.is_free(start, end),
+            'open_slots': [{'start': slot_start, 'end': slot_end}
+                           for slot_start, slot_end in
+                           bookings.open_slots(start, end, min_length)],
+        })
+    return availability
@@ -0,0 +1,69 @@
+"""Per-row cost of the `datetime` Jinja filter.
+
+Compares the original filter (str(start_time) re-parsed with dateutil and
+formatted with a pattern babel resolves on every call) with filters.py
+(datetime in, precompiled pattern, memoized), cold and warm.
+
+    python -m benchmarks.datetime_filter [--rows 2000] [--repeat 5]
+"""
+
+import argparse
+import datetime
+import timeit
+
+import babel.dates
+import dateutil.parser
+
+import filters
+
+
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def sample_times(rows):
+    # One listing page worth of show times, a few shows per day
+    start = datetime.datetime(2026, 1, 1, 20, 0)
+    return [start + datetime.timedelta(hours=6 * i) for i in range(rows)]
+
+
+def per_row_us(func, values, repeat):
+    best = min(timeit.repeat(lambda: [func(value, 'full') for value in values],
+                             number=1, repeat=repeat))
+    return best / len(values) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    times = sample_times(args.rows)
+    strings = [str(value) for value in times]
+    assert [legacy_format_datetime(value, 'full') for value in strings] == \
+        [filters.format_datetime(value, 'full') for value in times]
+
+    legacy = per_row_us(legacy_format_datetime, strings, args.repeat)
+
+    def cold(value, format):
+        filters._format_datetime.cache_clear()
+        return filters.format_datetime(value, format)
+    precompiled = per_row_us(cold, times, args.repeat)
+
+    filters._format_datetime.cache_clear()
+    memoized = per_row_us(filters.format_datetime, times, args.repeat)
+
+    print('rows: {}'.format(args.rows))
+    print('legacy (str + dateutil + babel pattern) {:8.2f} us/row'.format(legacy))
+    print('precompiled pattern, memo miss          {:8.2f} us/row'.format(precompiled))
+    print('precompiled pattern, memo hit           {:8.2f} us/row'.format(memoized))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Check that no route runs more SQL statements than its query budget.
+
+Every route of BUDGETS is requested against a small and a large synthetic
+catalogue, each seeded into its own scratch SQLite database, and the run fails
+when a request runs more statements than the budget at either size. Each route
+gets one warm-up request first. A view that queries once per venue, artist or
+show passes on the small catalogue but not on the large one. The venue with
+the most shows is deleted once at the end, and show batches with a bad row
+must be refused with a 422 and create nothing:
+
+    python -m benchmarks.query_budgets
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from sqlalchemy import func
+
+from app import create_app
+from benchmarks.routes import read_routes, request_once, write_routes
+from benchmarks.seed import seed
+from cache import NullCache, PageCache
+from models import db, Artist, Show, Venue
+
+# (name, venues, artists, shows)
+SIZES = [
+    ('small', 5, 20, 100),
+    ('large', 500, 5000, 50000),
+]
+
+# Most SQL statements one request of the route may run; the read budgets are
+# the ones in the README
+BUDGETS = {
+    'venues': 1,
+    'search_venues': 1,
+    'show_venue': 2,
+    'edit_venue': 2,
+    'artists': 1,
+    'search_artists': 1,
+    'show_artist': 2,
+    'edit_artist': 2,
+    'shows': 1,
+    'browse_genre': 3,
+    'create_venue_form': 0,
+    'create_artist_form': 0,
+    'create_shows': 0,
+    'create_venue_submission': 3,
+    'edit_venue_submission': 9,
+    'create_artist_submission': 3,
+    'edit_artist_submission': 9,
+    'create_show_submission': 4,
+    'create_show_batch_submission': 6,
+    'api_create_show_batch': 6,
+    'delete_venue': 8,
+    'create_show_batch_missing_start': 3,
+    'api_create_show_batch_missing_start': 3,
+    'api_create_show_batch_overlap': 3,
+}
+
+
+def rejected_routes(venue_ids, artist_ids):
+    # Show batches with one bad row each, which must be refused whole
+    venue_id, artist_id = venue_ids[0], artist_ids[0]
+
+    def row(**values):
+        return dict({'venue_id': venue_id, 'artist_id': artist_id,
+                     'duration_minutes': 60}, **values)
+
+    return [
+        ('create_show_batch_missing_start', 'POST', '/shows/batch', {
+            'shows': '{0}, {1}, 2102-01-01 20:00:00\n{0}, {1},'.format(
+                artist_id, venue_id)}),
+        ('api_create_show_batch_missing_start', 'POST',
+         '/api/v1/shows/batch', json.dumps({'shows': [
+             row(start_time='2102-01-01T20:00:00'), row()]})),
+        ('api_create_show_batch_overlap', 'POST', '/api/v1/shows/batch',
+         json.dumps({'shows': [row(start_time='2102-01-01T20:00:00'),
+                               row(start_time='2102-01-01T20:30:00')]})),
+    ]
+
+
+def check(client, routes, requests):
+    # (route, statements, status) of every request over its budget
+    failures = []
+    for name, method, url, data in routes:
+        if name not in BUDGETS:
+            continue
+        # The first request also runs one-off probes, e.g. for the FTS tables
+        request_once(client, method, url, data)
+        for _ in range(requests):
+            _, statements, status = request_once(client, method, url, data)
+            # A failed request runs fewer statements than a served one
+            if status >= 400 or statements > BUDGETS[name] or \
+                    (BUDGETS[name] and not statements):
+                failures.append((name, statements, status))
+                break
+    return failures
+
+
+def check_rejected(client, routes):
+    # (route, statements, status) of every bad batch that was not answered
+    # 422 within its budget, or that created any show
+    failures = []
+    for name, method, url, data in routes:
+        with client.application.app_context():
+            before = Show.query.count()
+        _, statements, status = request_once(client, method, url, data)
+        with client.application.app_context():
+            created = Show.query.count() - before
+        if status != 422 or statements > BUDGETS[name] or created:
+            failures.append((name, statements, status))
+    return failures
+
+
+def check_delete(client):
+    # Deleting the venue with the most shows, whose counters and cascades
+    # must not cost a statement per show
+    with client.application.app_context():
+        venue_id = db.session.query(Show.venue_id).group_by(
+            Show.venue_id).order_by(func.count().desc()).limit(1).scalar()
+    _, statements, status = request_once(
+        client, 'DELETE', '/venues/{}'.format(venue_id), None)
+    if status >= 400 or statements > BUDGETS['delete_venue']:
+        return [('delete_venue', statements, status)]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5,
+                        help='requests per route and size')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    scratch = tempfile.mkdtemp(prefix='fyyur-budgets-')
+    failed = False
+    try:
+        for size, venue_count, artist_count, show_count in SIZES:
+            app = create_app({
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(
+                    scratch, size + '.db'),
+                'DATABASE_REPLICA_URLS': [],
+                'WTF_CSRF_ENABLED': False,
+                'REQUEST_STATS_HEADERS': True,
+            })
+            app.logger.setLevel(logging.ERROR)
+            app.extensions['page_cache'] = PageCache(NullCache(), 0)
+            with app.app_context():
+                seed(venue_count, artist_count, show_count, args.seed,
+                     verbose=False)
+                venue_ids = [row.id for row in db.session.query(Venue.id)]
+                artist_ids = [row.id for row in db.session.query(Artist.id)]
+
+            routes = read_routes(venue_ids, artist_ids) + \
+                write_routes(venue_ids, artist_ids)
+            client = app.test_client()
+            failures = check(client, routes, args.requests) + check_rejected(
+                client, rejected_routes(venue_ids, artist_ids)) + \
+                check_delete(client)
+            print('{}: {} venues, {} artists, {} shows, {} over budget'.format(
+                size, venue_count, artist_count, show_count, len(failures)))
+            for name, statements, status in failures:
+                print('  {}: {} statements (budget {}), status {}'.format(
+                    name, statements, BUDGETS[name], status), file=sys.stderr)
+            failed = failed or bool(failures)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
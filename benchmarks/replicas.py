@@ -0,0 +1,135 @@
+"""Check read-replica routing against a primary and a replica SQLite file.
+
+A small catalogue is seeded into the primary and copied to the replica, then
+one venue is renamed in the replica only, so every page tells which database
+it was read from. The run fails unless @read_only views read the replica,
+other views and every write use the primary, and a client that just wrote
+reads the primary until its sticky cookie expires:
+
+    python -m benchmarks.replicas
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from app import create_app
+from benchmarks.seed import seed
+from cache import NullCache, PageCache
+from database import STICKY_COOKIE
+from models import db, Venue
+
+REPLICA_NAME = 'Read From Replica'
+
+NEW_VENUE = {
+    'name': 'Written To Primary',
+    'city': 'San Francisco', 'state': 'CA', 'address': '1 Main Street',
+    'phone': '4155550100', 'genres': ['Jazz'],
+    'image_link': 'https://example.com/v.jpg',
+    'facebook_link': 'https://facebook.com/primary',
+    'website_link': 'https://primary.example.com',
+    'seeking_description': '',
+}
+
+
+def build(scratch, random_seed):
+    primary = os.path.join(scratch, 'primary.db')
+    replica = os.path.join(scratch, 'replica.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + primary,
+        'DATABASE_REPLICA_URLS': ['sqlite:///' + replica],
+        'WTF_CSRF_ENABLED': False,
+    })
+    app.logger.setLevel(logging.ERROR)
+    app.extensions['page_cache'] = PageCache(NullCache(), 0)
+    with app.app_context():
+        seed(5, 20, 100, random_seed, verbose=False)
+        venue = Venue.query.order_by(Venue.id).first()
+        venue_id, primary_name = venue.id, venue.name
+        db.session.remove()
+        db.engine.dispose()
+    shutil.copyfile(primary, replica)
+    with sqlite3.connect(replica) as conn:
+        conn.execute('UPDATE "Venue" SET name = ? WHERE id = ?',
+                     (REPLICA_NAME, venue_id))
+    conn.close()
+    return app, primary, venue_id, primary_name
+
+
+def check(app, primary, venue_id, primary_name):
+    # Failure messages, empty when the routing works
+    failures = []
+
+    def expect(condition, message):
+        if not condition:
+            failures.append(message)
+
+    def reads(response):
+        body = response.get_data(as_text=True)
+        if REPLICA_NAME in body:
+            return 'replica'
+        if primary_name in body:
+            return 'primary'
+        return 'neither ({})'.format(response.status_code)
+
+    reader = app.test_client()
+    page = '/venues/{}'.format(venue_id)
+    expect(reads(reader.get(page)) == 'replica',
+           'read-only detail page did not read the replica')
+    expect(reads(reader.get('/venues')) == 'replica',
+           'read-only listing did not read the replica')
+    expect(reads(reader.get(page + '/edit')) == 'primary',
+           'edit form (not read-only) did not read the primary')
+
+    writer = app.test_client()
+    response = writer.post('/venues/create', data=NEW_VENUE)
+    with sqlite3.connect(primary) as conn:
+        row = conn.execute('SELECT id FROM "Venue" WHERE name = ?',
+                           (NEW_VENUE['name'],)).fetchone()
+    conn.close()
+    expect(row is not None, 'venue creation did not write to the primary')
+    cookie = next((value for value in response.headers.getlist('Set-Cookie')
+                   if value.startswith(STICKY_COOKIE + '=')), None)
+    expect(cookie is not None, 'a write did not set the sticky cookie')
+    if row is None or cookie is None:
+        return failures
+
+    def shows_new_venue(client):
+        return NEW_VENUE['name'] in client.get(
+            '/venues/{}'.format(row[0])).get_data(as_text=True)
+
+    expect(shows_new_venue(writer),
+           'the writer did not read its own write from the primary')
+    expect(reads(writer.get(page)) == 'primary',
+           'the writer read the replica while sticky')
+    expect(not shows_new_venue(reader),
+           'another client did not read the replica after the write')
+    writer.cookie_jar.clear()
+    expect(reads(writer.get(page)) == 'replica',
+           'the writer stayed on the primary without the sticky cookie')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='fyyur-replicas-')
+    try:
+        failures = check(*build(scratch, args.seed))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    print('replica routing: {} failures'.format(len(failures)))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""Latency, query count and memory of every route, checked against a baseline.
+
+Each route is requested through the Flask test client against the database in
+DATABASE_URL (fill one with benchmarks.seed). The report gives the p50 / p99
+latency, the most SQL statements one request ran and the peak memory
+allocated while serving one request. The run fails when a route runs more
+statements than in the baseline file, or gets slower or hungrier than the
+baseline by more than --tolerance:
+
+    DATABASE_URL=sqlite:////tmp/fyyur-bench.db python -m benchmarks.routes
+    DATABASE_URL=... python -m benchmarks.routes --update-baseline
+
+The page cache is off unless --cache is given, so detail pages are rendered
+every time. --writes adds the create / edit / delete routes, which change the
+database.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from app import create_app
+from cache import NullCache, PageCache
+from models import db, Artist, Show, Venue
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Latency and memory regressions smaller than these are noise
+LATENCY_FLOOR_MS = 10.0
+MEMORY_FLOOR_KIB = 64.0
+
+STATEMENTS = re.compile(r'desc="statements=(\d+)"')
+
+# Shows per batch of the batch create routes
+BATCH_SIZE = 20
+
+
+def read_routes(venue_ids, artist_ids):
+    # (name, method, url or url factory, form data)
+    def venue():
+        return random.choice(venue_ids)
+
+    def artist():
+        return random.choice(artist_ids)
+
+    return [
+        ('index', 'GET', '/', None),
+        ('venues', 'GET', '/venues', None),
+        ('search_venues', 'POST', '/venues/search', {'search_term': 'Blue'}),
+        ('show_venue', 'GET', lambda: '/venues/{}'.format(venue()), None),
+        ('create_venue_form', 'GET', '/venues/create', None),
+        ('edit_venue', 'GET', lambda: '/venues/{}/edit'.format(venue()), None),
+        ('artists', 'GET', '/artists', None),
+        ('search_artists', 'POST', '/artists/search', {'search_term': 'Wolves'}),
+        ('show_artist', 'GET', lambda: '/artists/{}'.format(artist()), None),
+        ('create_artist_form', 'GET', '/artists/create', None),
+        ('edit_artist', 'GET', lambda: '/artists/{}/edit'.format(artist()),
+         None),
+        ('shows', 'GET', '/shows', None),
+        ('create_shows', 'GET', '/shows/create', None),
+        ('browse_genre', 'GET', '/genres/Jazz', None),
+        ('api.venues', 'GET', '/api/v1/venues', None),
+        ('api.show_venue', 'GET',
+         lambda: '/api/v1/venues/{}'.format(venue()), None),
+        ('api.shows', 'GET', '/api/v1/shows', None),
+        ('api.search_availability', 'GET',
+         '/api/v1/availability?city=San+Francisco&state=CA&start=2026-01-01'
+         '&end=2026-01-07', None),
+    ]
+
+
+def write_routes(venue_ids, artist_ids):
+    counter = iter(range(10 ** 9))
+
+    def venue_form():
+        return {
+            'name': 'Benchmark Venue {}'.format(next(counter)),
+            'city': 'San Francisco', 'state': 'CA', 'address': '1 Main Street',
+            'phone': '4155550100', 'genres': ['Jazz', 'Blues'],
+            'image_link': 'https://example.com/v.jpg',
+            'facebook_link': 'https://facebook.com/benchmark',
+            'website_link': 'https://benchmark.example.com',
+            'seeking_description': '',
+        }
+
+    def edited_venue_form():
+        form = venue_form()
+        form['name'] = 'Edited Venue {}'.format(next(counter))
+        return form
+
+    def artist_form():
+        form = venue_form()
+        form['name'] = 'Benchmark Artist {}'.format(next(counter))
+        del form['address']
+        return form
+
+    def show_form():
+        # Far enough in the future not to collide with seeded shows
+        return {
+            'venue_id': str(random.choice(venue_ids)),
+            'artist_id': str(random.choice(artist_ids)),
+            'start_time': '2100-01-01 {:02d}:00:00'.format(next(counter) % 24),
+            'duration_minutes': '30',
+        }
+
+    def show_batch(size):
+        # One show per day from 2101 on, clear of show_form's slots
+        first = datetime.datetime(2101, 1, 1, 20)
+        return [{
+            'venue_id': random.choice(venue_ids),
+            'artist_id': random.choice(artist_ids),
+            'start_time': str(first + datetime.timedelta(days=next(counter))),
+            'duration_minutes': 90,
+        } for _ in range(size)]
+
+    def show_batch_form():
+        return {'shows': '\n'.join(
+            '{artist_id}, {venue_id}, {start_time}, {duration_minutes}'.format(
+                **row) for row in show_batch(BATCH_SIZE))}
+
+    def show_batch_json():
+        return json.dumps({'shows': show_batch(BATCH_SIZE)})
+
+    def created_venue():
+        # Venues made by create_venue_submission, which have no shows
+        venue = Venue.query.filter(Venue.name.like('Benchmark Venue %')) \
+            .order_by(Venue.id).first()
+        return '/venues/{}'.format(venue.id if venue else 0)
+
+    return [
+        ('create_venue_submission', 'POST', '/venues/create', venue_form),
+        ('edit_venue_submission', 'POST',
+         lambda: '/venues/{}/edit'.format(random.choice(venue_ids)),
+         edited_venue_form),
+        ('create_artist_submission', 'POST', '/artists/create', artist_form),
+        ('edit_artist_submission', 'POST',
+         lambda: '/artists/{}/edit'.format(random.choice(artist_ids)),
+         artist_form),
+        ('create_show_submission', 'POST', '/shows/create', show_form),
+        ('create_show_batch_submission', 'POST', '/shows/batch',
+         show_batch_form),
+        ('api_create_show_batch', 'POST', '/api/v1/shows/batch',
+         show_batch_json),
+        ('delete_venue', 'DELETE', created_venue, None),
+    ]
+
+
+def request_once(client, method, url, data):
+    with client.application.app_context():
+        url = url() if callable(url) else url
+        data = data() if callable(data) else data
+    started = time.perf_counter()
+    # A string is a JSON body
+    response = client.open(
+        url, method=method, data=data,
+        content_type='application/json' if isinstance(data, str) else None)
+    elapsed = time.perf_counter() - started
+    match = STATEMENTS.search(response.headers.get('Server-Timing', ''))
+    return elapsed, int(match.group(1)) if match else 0, response.status_code
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def measure(client, route, requests, warmup):
+    name, method, url, data = route
+    for _ in range(warmup):
+        request_once(client, method, url, data)
+    latencies, statements = [], []
+    for _ in range(requests):
+        elapsed, count, _ = request_once(client, method, url, data)
+        latencies.append(elapsed * 1000)
+        statements.append(count)
+
+    # One more request with allocations traced, which slows it down
+    tracemalloc.start()
+    request_once(client, method, url, data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries': max(statements),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    # Human readable reasons the run is worse than the baseline
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            found.append('{}: {} queries, baseline {}'.format(
+                name, result['queries'], base['queries']))
+        limit = max(base['p99_ms'] * (1 + tolerance),
+                    base['p99_ms'] + LATENCY_FLOOR_MS)
+        if result['p99_ms'] > limit:
+            found.append('{}: p99 {:.1f} ms, baseline {:.1f} ms'.format(
+                name, result['p99_ms'], base['p99_ms']))
+        limit = max(base['peak_kib'] * (1 + tolerance),
+                    base['peak_kib'] + MEMORY_FLOOR_KIB)
+        if result['peak_kib'] > limit:
+            found.append('{}: peak {:.0f} KiB, baseline {:.0f} KiB'.format(
+                name, result['peak_kib'], base['peak_kib']))
+    return found
+
+
+def dataset():
+    return {
+        'venues': db.session.query(Venue).count(),
+        'artists': db.session.query(Artist).count(),
+        'shows': db.session.query(Show).count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50,
+                        help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help='allowed relative latency / memory growth')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the configured page cache')
+    parser.add_argument('--writes', action='store_true',
+                        help='also run the routes that change data')
+    parser.add_argument('--route', action='append',
+                        help='only run these routes')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    app = create_app({'WTF_CSRF_ENABLED': False,
+                      'REQUEST_STATS_HEADERS': True})
+    # Repeated statements show up in the queries column
+    app.logger.setLevel(logging.ERROR)
+    if not args.cache:
+        app.extensions['page_cache'] = PageCache(NullCache(), 0)
+
+    with app.app_context():
+        data = dataset()
+        venue_ids = [row.id for row in db.session.query(Venue.id)]
+        artist_ids = [row.id for row in db.session.query(Artist.id)]
+    if not venue_ids or not artist_ids:
+        sys.exit('No venues or artists; fill the database with '
+                 'benchmarks.seed first.')
+
+    routes = read_routes(venue_ids, artist_ids)
+    if args.writes:
+        routes += write_routes(venue_ids, artist_ids)
+    if args.route:
+        routes = [route for route in routes if route[0] in args.route]
+
+    client = app.test_client()
+    results = {}
+    print('{} venues, {} artists, {} shows'.format(
+        data['venues'], data['artists'], data['shows']))
+    print('{:<28} {:>9} {:>9} {:>8} {:>10}'.format(
+        'route', 'p50 ms', 'p99 ms', 'queries', 'peak KiB'))
+    for route in routes:
+        result = results[route[0]] = measure(
+            client, route, args.requests, args.warmup)
+        print('{:<28} {:>9.2f} {:>9.2f} {:>8} {:>10.1f}'.format(
+            route[0], result['p50_ms'], result['p99_ms'], result['queries'],
+            result['peak_kib']))
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as out:
+            json.dump({'dataset': data, 'routes': results}, out, indent=2,
+                      sort_keys=True)
+            out.write('\n')
+        print('Baseline written to {}'.format(args.baseline))
+        return
+
+    if not os.path.exists(args.baseline):
+        sys.exit('No baseline at {}; run with --update-baseline first.'.format(
+            args.baseline))
+    with open(args.baseline) as source:
+        baseline = json.load(source)
+    if baseline['dataset'] != data:
+        print('Warning: the baseline was measured on {venues} venues, '
+              '{artists} artists, {shows} shows'.format(**baseline['dataset']))
+    found = regressions(results, baseline['routes'], args.tolerance)
+    for line in found:
+        print('REGRESSION ' + line, file=sys.stderr)
+    if found:
+        sys.exit(1)
+    print('No regressions against {}'.format(args.baseline))
+
+
+if __name__ == '__main__':
+    main()
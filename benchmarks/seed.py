@@ -0,0 +1,179 @@
+"""Fill an empty database with a reproducible synthetic catalogue.
+
+Venues, artists (with genres) and shows are generated from a seeded random
+generator and written with the bulk import path (COPY on Postgres, executemany
+on SQLite), then the show counters are recomputed. Every venue gets at most
+one show per three-day window, so no two shows overlap. The database comes from
+DATABASE_URL and is migrated first:
+
+    DATABASE_URL=sqlite:////tmp/fyyur-bench.db python -m benchmarks.seed \\
+        --venues 10000 --artists 100000 --shows 1000000
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+from flask_migrate import upgrade
+
+import counters
+from app import create_app
+from importer import insert_rows
+from models import db, Artist, Genre, Show, Venue, artist_genres, venue_genres
+
+CITIES = [
+    ('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('New York', 'NY'),
+    ('Brooklyn', 'NY'), ('Austin', 'TX'), ('Houston', 'TX'),
+    ('Chicago', 'IL'), ('Seattle', 'WA'), ('Portland', 'OR'),
+    ('Denver', 'CO'), ('Nashville', 'TN'), ('Atlanta', 'GA'),
+    ('Miami', 'FL'), ('Boston', 'MA'), ('Philadelphia', 'PA'),
+    ('New Orleans', 'LA'), ('Detroit', 'MI'), ('Minneapolis', 'MN'),
+]
+ADJECTIVES = ['Blue', 'Red', 'Golden', 'Silver', 'Velvet', 'Electric', 'Hidden',
+              'Broken', 'Wild', 'Lucky', 'Midnight', 'Crystal', 'Rusty', 'Neon']
+VENUE_NOUNS = ['Room', 'Hall', 'Lounge', 'Club', 'Theater', 'Garage', 'Bar',
+               'Ballroom', 'Cellar', 'Warehouse', 'Stage', 'Tavern']
+ARTIST_NOUNS = ['Guns', 'Foxes', 'Engines', 'Kites', 'Wolves', 'Lanterns',
+                'Saints', 'Orchestra', 'Collective', 'Trio', 'Quartet', 'Band']
+
+CHUNK_SIZE = 5000
+
+
+def chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write(table, rows, links_table=None, link_column=None):
+    # Insert rows in chunks, each committed with its genre rows
+    count = 0
+    for chunk in chunks(rows):
+        links = []
+        for row in chunk:
+            links += [{'genre_id': genre_id, link_column: row['id']}
+                      for genre_id in row.pop('genre_ids', ())]
+        insert_rows(table, chunk)
+        if links_table is not None:
+            insert_rows(links_table, links)
+        db.session.commit()
+        count += len(chunk)
+    return count
+
+
+def venues(rng, count, genre_ids, now):
+    for venue_id in range(1, count + 1):
+        city, state = rng.choice(CITIES)
+        name = 'The {} {} {}'.format(
+            rng.choice(ADJECTIVES), rng.choice(VENUE_NOUNS), venue_id)
+        yield {
+            'id': venue_id, 'name': name, 'city': city, 'state': state,
+            'address': '{} Main Street'.format(rng.randrange(1, 9999)),
+            'phone': '{:010d}'.format(rng.randrange(10 ** 10)),
+            'image_link': 'https://example.com/venues/{}.jpg'.format(venue_id),
+            'facebook_link': 'https://facebook.com/venue{}'.format(venue_id),
+            'website_link': 'https://venue{}.example.com'.format(venue_id),
+            'seeking_talent': rng.random() < 0.3,
+            'seeking_description': 'Looking for local acts',
+            'num_upcoming_shows': 0, 'num_past_shows': 0, 'updated_at': now,
+            'genre_ids': rng.sample(genre_ids, rng.randint(1, 3)),
+        }
+
+
+def artists(rng, count, genre_ids, now):
+    for artist_id in range(1, count + 1):
+        city, state = rng.choice(CITIES)
+        name = '{} {} {}'.format(
+            rng.choice(ADJECTIVES), rng.choice(ARTIST_NOUNS), artist_id)
+        yield {
+            'id': artist_id, 'name': name, 'city': city, 'state': state,
+            'phone': '{:010d}'.format(rng.randrange(10 ** 10)),
+            'image_link': 'https://example.com/artists/{}.jpg'.format(artist_id),
+            'facebook_link': 'https://facebook.com/artist{}'.format(artist_id),
+            'website_link': 'https://artist{}.example.com'.format(artist_id),
+            'seeking_venue': rng.random() < 0.3,
+            'seeking_description': 'Looking for a stage',
+            'num_upcoming_shows': 0, 'num_past_shows': 0, 'updated_at': now,
+            'genre_ids': rng.sample(genre_ids, rng.randint(1, 3)),
+        }
+
+
+def shows(rng, count, venue_count, artist_count, now):
+    # Show k of a venue lands in the k-th three-day window from the start,
+    # which lies far enough back for about half of the shows to be past
+    per_venue = max(1, count // venue_count)
+    start = (now - datetime.timedelta(days=3 * per_venue // 2)).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    booked = [0] * (venue_count + 1)
+    for show_id in range(1, count + 1):
+        venue_id = rng.randint(1, venue_count)
+        window = booked[venue_id]
+        booked[venue_id] += 1
+        yield {
+            'id': show_id,
+            'venue_id': venue_id,
+            'artist_id': rng.randint(1, artist_count),
+            'start_time': start + datetime.timedelta(
+                days=3 * window + rng.randrange(3),
+                hours=rng.randint(17, 22)),
+            'duration_minutes': rng.choice((60, 90, 120, 180)),
+            'updated_at': now,
+        }
+
+
+def seed(venue_count, artist_count, show_count, random_seed=1, verbose=True):
+    # Migrate the database of the current app and fill it
+    rng = random.Random(random_seed)
+    now = datetime.datetime.utcnow()
+    upgrade()
+    if db.session.query(Venue.id).first() or \
+            db.session.query(Artist.id).first():
+        sys.exit('The database already has venues or artists; '
+                 'seed an empty one.')
+    genre_ids = [genre.id for genre in Genre.query.order_by(Genre.id)]
+
+    started = time.perf_counter()
+    counts = [
+        ('venues', write(Venue.__table__,
+                         venues(rng, venue_count, genre_ids, now),
+                         venue_genres, 'venue_id')),
+        ('artists', write(Artist.__table__,
+                          artists(rng, artist_count, genre_ids, now),
+                          artist_genres, 'artist_id')),
+        ('shows', write(Show.__table__, shows(
+            rng, show_count, venue_count, artist_count, now))),
+    ]
+    if db.engine.dialect.name == 'postgresql':
+        # Rows were written with explicit ids
+        for table in ('Venue', 'Artist', 'Show'):
+            db.session.execute(
+                "SELECT setval(pg_get_serial_sequence('\"{0}\"', 'id'), "
+                "(SELECT max(id) FROM \"{0}\"))".format(table))
+    counters.repair()
+    if verbose:
+        for name, count in counts:
+            print('{:>9} {}'.format(count, name))
+        print('seeded in {:.1f}s'.format(time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=10000)
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        seed(args.venues, args.artists, args.shows, args.seed)
+
+
+if __name__ == '__main__':
+    main()
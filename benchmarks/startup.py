@@ -0,0 +1,72 @@
+"""Worker startup time: importing the app, create_app() and the first request.
+
+Each run is a fresh interpreter, like a newly started worker. The run fails
+when the median of any phase is over its budget:
+
+    DATABASE_URL=sqlite:////tmp/fyyur-bench.db python -m benchmarks.startup
+
+With a preloading server (gunicorn --preload 'app:create_app()') the import
+and create_app() are paid once by the parent and shared by the forked workers.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Milliseconds per phase
+BUDGETS = {
+    'import': 600,
+    'create_app': 100,
+    'first_request': 100,
+}
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import': (imported - started) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first_request': (served - created) * 1000,
+}))
+'''
+
+
+def measure(runs):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = {phase: [] for phase in BUDGETS}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', PROBE], cwd=root,
+            check=True, stdout=subprocess.PIPE).stdout
+        for phase, value in json.loads(output.splitlines()[-1]).items():
+            samples[phase].append(value)
+    return {phase: statistics.median(values)
+            for phase, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    medians = measure(args.runs)
+    over = False
+    for phase, budget in BUDGETS.items():
+        print('{:<14} {:>8.1f} ms  (budget {} ms)'.format(
+            phase, medians[phase], budget))
+        over = over or medians[phase] > budget
+    if over:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#----------------------------------------------------------------------------#
+# Rendered-page cache for the venue and artist detail pages.
+#
+# Pages are stored under "venue:<id>" / "artist:<id>" and dropped by the write
+# paths that change them (see invalidate()). A page holding upcoming shows
+# expires when the first of them starts, so it never shows a past show as
+# upcoming. The backend is picked by PAGE_CACHE_BACKEND:
+#   'lru'   -- in-process LRU bounded by entries and bytes (default); other
+#              workers never see its invalidations, so pages only live
+#              PAGE_CACHE_LOCAL_TIMEOUT seconds
+#   'redis' -- shared between workers, needs the redis package; the default
+#              when PAGE_CACHE_REDIS_URL is set
+#   'null'  -- caching disabled
+#----------------------------------------------------------------------------#
+
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, jsonify, session
+
+import conditional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class NullCache(object):
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+
+class LRUCache(object):
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        # Sized in UTF-8 bytes, not characters, so non-ASCII pages count in
+        # full against max_bytes
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (value, time.time() + timeout, size)
+            self.size += size
+            # Evict least recently used pages until both limits hold
+            while len(self._entries) > self.max_entries or \
+                    self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+class RedisCache(object):
+
+    def __init__(self, url, prefix='fyyur:page:'):
+        if redis is None:
+            raise RuntimeError("The 'redis' backend needs the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, timeout):
+        self.client.set(self.prefix + key, value.encode('utf-8'),
+                        px=max(1, int(timeout * 1000)))
+
+    def delete_many(self, keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+
+class PageCache(object):
+
+    def __init__(self, backend, timeout):
+        self.backend = backend
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        # += on the counters is not atomic across request threads
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, until=None):
+        timeout = self.timeout
+        if until is not None:
+            timeout = min(timeout, (until - datetime.datetime.now()).total_seconds())
+        if timeout > 0:
+            self.backend.set(key, value, timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = {'hits': self.hits, 'misses': self.misses}
+        if isinstance(self.backend, LRUCache):
+            with self.backend._lock:
+                stats['entries'] = len(self.backend._entries)
+                stats['bytes'] = self.backend.size
+        return stats
+
+
+def create_backend(config):
+    backend = config['PAGE_CACHE_BACKEND']
+    if backend == 'lru':
+        return LRUCache(config['PAGE_CACHE_MAX_ENTRIES'],
+                        config['PAGE_CACHE_MAX_BYTES'])
+    if backend == 'redis':
+        return RedisCache(config['PAGE_CACHE_REDIS_URL'])
+    if backend == 'null':
+        return NullCache()
+    raise ValueError('Unknown PAGE_CACHE_BACKEND {!r}'.format(backend))
+
+
+def get_cache():
+    return current_app.extensions['page_cache']
+
+
+def store_page(until=None):
+    # Called by a cached view once it knows its page may be cached; until is
+    # the moment the page goes stale on its own (its next upcoming show)
+    g.page_cache_until = until
+    g.page_cache_store = True
+
+
+def cache_until(until):
+    # A page read from a replica may predate a write that was just
+    # invalidated; keep it no longer than the lag the replicas are allowed
+    if g.get('db_replica') is None:
+        return until
+    lag = datetime.datetime.now() + datetime.timedelta(
+        seconds=current_app.config['REPLICA_STICKY_SECONDS'])
+    return min(until, lag) if until else lag
+
+
+def pack(validators, page):
+    # Cached pages keep their validators so a hit can still answer 304
+    etag, last_modified = validators
+    stamp = last_modified.isoformat() if last_modified else ''
+    return '\n'.join([etag, stamp, page])
+
+
+def unpack(value):
+    etag, stamp, page = value.split('\n', 2)
+    last_modified = datetime.datetime.fromisoformat(stamp) if stamp else None
+    return etag, last_modified, page
+
+
+def cached_page(kind, id_arg):
+    # Serve the view from the cache under "<kind>:<id>". Requests with pending
+    # flash messages bypass the cache since those are rendered into the page.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if session.get('_flashes'):
+                return view(**kwargs)
+
+            page_cache = get_cache()
+            key = '{}:{}'.format(kind, kwargs[id_arg])
+            cached = page_cache.get(key)
+            if cached is not None:
+                etag, last_modified, page = unpack(cached)
+                not_modified = conditional.validate(etag, last_modified)
+                return page if not_modified is None else not_modified
+
+            page = view(**kwargs)
+            if g.get('page_cache_store') and isinstance(page, str):
+                page_cache.set(key, pack(g.validators, page),
+                               cache_until(g.page_cache_until))
+            return page
+        return wrapper
+    return decorator
+
+
+def invalidate(venue_ids=(), artist_ids=()):
+    keys = ['venue:{}'.format(venue_id) for venue_id in set(venue_ids)]
+    keys += ['artist:{}'.format(artist_id) for artist_id in set(artist_ids)]
+    get_cache().backend.delete_many(keys)
+
+
+def init_app(app):
+    timeout = app.config['PAGE_CACHE_TIMEOUT']
+    if app.config['PAGE_CACHE_BACKEND'] == 'lru':
+        # Invalidation only reaches the worker that made the change
+        timeout = min(timeout, app.config['PAGE_CACHE_LOCAL_TIMEOUT'])
+    app.extensions['page_cache'] = PageCache(create_backend(app.config),
+                                             timeout)
+
+    @app.route('/cache/stats')
+    def cache_stats():
+        return jsonify(get_cache().stats())
@@ -0,0 +1,48 @@
+#----------------------------------------------------------------------------#
+# Conditional GET (ETag / Last-Modified) for the read routes.
+#
+# Views compute their validators from the updated_at timestamps of the rows
+# they load and call validate() before rendering; an unchanged page is answered
+# with 304 Not Modified without any template work.
+#----------------------------------------------------------------------------#
+
+import hashlib
+
+from flask import current_app, g, request, session
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def validate(etag, last_modified):
+    # Return a 304 response when the client already has this version of the
+    # page. Pages rendering pending flash messages are never validated, since
+    # the messages are part of the body.
+    if session.get('_flashes'):
+        return None
+    g.validators = (etag, last_modified)
+
+    response = current_app.response_class()
+    set_validators(response, etag, last_modified)
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    return None
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Caches may keep the page but must revalidate it on every use
+    response.cache_control.no_cache = True
+
+
+def init_app(app):
+    @app.after_request
+    def add_validators(response):
+        validators = g.get('validators')
+        if validators and response.status_code == 200:
+            set_validators(response, *validators)
+        return response
@@ -0,0 +1,83 @@
+#----------------------------------------------------------------------------#
+# Upcoming / past show counters on Venue and Artist.
+#
+# Creating a Show adjusts the counters of its venue and artist and deleting
+# one recounts them (see the Show mapper events in models.py). Shows only move from upcoming to
+# past with time, so `flask counters-rollover` must run periodically (every few
+# minutes from cron) to recount the entities whose shows started since the last
+# runs. `flask counters-repair` recounts everything in one statement per table.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+import click
+from sqlalchemy import and_, select
+
+from models import db, Venue, Artist, Show, recount_values
+
+COUNTED = (
+    (Venue, Show.venue_id),
+    (Artist, Show.artist_id),
+)
+
+
+def recount_statement(model, foreign_key, now, where=None):
+    # UPDATE ... SET num_upcoming_shows = (SELECT count(*) ...), ...
+    statement = model.__table__.update().values(
+        recount_values(model, foreign_key, now))
+    if where is not None:
+        statement = statement.where(where)
+    return statement
+
+
+def refresh(venue_ids=(), artist_ids=(), now=None):
+    # Recount the given venues and artists, e.g. after a bulk insert that
+    # bypassed the mapper events. The caller commits.
+    now = now or datetime.datetime.now()
+    for (model, foreign_key), ids in zip(COUNTED, (venue_ids, artist_ids)):
+        ids = list(set(ids))
+        if ids:
+            db.session.execute(recount_statement(
+                model, foreign_key, now, model.__table__.c.id.in_(ids)))
+
+
+def rollover(since, now=None):
+    # Recount every venue and artist with a show that started in
+    # [since, now). Recounting is idempotent, so overlapping runs are safe.
+    now = now or datetime.datetime.now()
+    updated = 0
+    for model, foreign_key in COUNTED:
+        started = select([foreign_key]).where(
+            and_(Show.start_time >= since, Show.start_time < now))
+        result = db.session.execute(recount_statement(
+            model, foreign_key, now, model.__table__.c.id.in_(started)))
+        updated += result.rowcount
+    db.session.commit()
+    return updated
+
+
+def repair(now=None):
+    # Recount every venue and artist in bulk
+    now = now or datetime.datetime.now()
+    updated = 0
+    for model, foreign_key in COUNTED:
+        result = db.session.execute(recount_statement(model, foreign_key, now))
+        updated += result.rowcount
+    db.session.commit()
+    return updated
+
+
+def init_app(app):
+    @app.cli.command('counters-rollover')
+    @click.option('--minutes', type=int, default=None,
+                  help='How far back to look for shows that have started.')
+    def counters_rollover_command(minutes):
+        """Move shows that have started from upcoming to past counters."""
+        minutes = minutes or app.config['COUNTER_ROLLOVER_MINUTES']
+        since = datetime.datetime.now() - datetime.timedelta(minutes=minutes)
+        print('Recounted {} venues and artists.'.format(rollover(since)))
+
+    @app.cli.command('counters-repair')
+    def counters_repair_command():
+        """Recompute every venue and artist show counter."""
+        print('Recounted {} venues and artists.'.format(repair()))
@@ -0,0 +1,100 @@
+#----------------------------------------------------------------------------#
+# Database engines: pool settings and read-replica routing.
+#
+# Pool size, overflow, pre-ping, recycle and the statement timeout come from
+# the environment through config.py. When DATABASE_REPLICA_URLS is set, views
+# marked @read_only run their queries on a replica picked per request; every
+# other view, the CLI and any flush use the primary. A write request (POST or
+# DELETE) gets a cookie that keeps the client's reads on the primary for
+# REPLICA_STICKY_SECONDS, so it reads its own writes despite replication lag.
+#----------------------------------------------------------------------------#
+
+import random
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import create_engine, orm
+from sqlalchemy.engine.url import make_url
+
+STICKY_COOKIE = 'db_primary'
+
+
+def engine_options(uri, config):
+    # create_engine() keyword arguments for the configured pool settings
+    options = {
+        'pool_pre_ping': config['DATABASE_POOL_PRE_PING'],
+        'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+    }
+    backend = make_url(uri).get_backend_name()
+    if backend != 'sqlite':
+        # SQLite connections are not pooled by size
+        options['pool_size'] = config['DATABASE_POOL_SIZE']
+        options['max_overflow'] = config['DATABASE_MAX_OVERFLOW']
+        options['pool_timeout'] = config['DATABASE_POOL_TIMEOUT']
+    timeout = config['DATABASE_STATEMENT_TIMEOUT_MS']
+    if timeout and backend == 'postgresql':
+        options['connect_args'] = {
+            'options': '-c statement_timeout={:d}'.format(timeout)}
+    return options
+
+
+class RoutingSession(SignallingSession):
+
+    def get_bind(self, mapper=None, clause=None):
+        # Reads of a @read_only view go to its replica; flushes never do
+        replica = g.get('db_replica') if has_request_context() else None
+        if replica is None or self._flushing:
+            return super().get_bind(mapper, clause)
+        return replica
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def read_only(view):
+    # Let the view read from a replica
+    view.db_read_only = True
+    return view
+
+
+def is_read_only():
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'db_read_only', False)
+
+
+def pick_replica():
+    # A replica engine for this request, or None to stay on the primary
+    replicas = current_app.extensions.get('db_replicas')
+    if not replicas or request.cookies.get(STICKY_COOKIE) or \
+            not is_read_only():
+        return None
+    return random.choice(replicas)
+
+
+def init_app(app):
+    config = app.config
+    # Options set by hand in SQLALCHEMY_ENGINE_OPTIONS win
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+        engine_options(config['SQLALCHEMY_DATABASE_URI'], config),
+        **config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.extensions['db_replicas'] = [
+        create_engine(uri, **engine_options(uri, config))
+        for uri in config['DATABASE_REPLICA_URLS']]
+
+    @app.before_request
+    def route_reads():
+        g.db_replica = pick_replica()
+
+    @app.after_request
+    def stick_to_primary(response):
+        # Any POST / DELETE that did not fail may have written
+        if app.extensions['db_replicas'] and \
+                request.method not in ('GET', 'HEAD') and \
+                response.status_code < 400 and not is_read_only():
+            response.set_cookie(STICKY_COOKIE, '1',
+                                max_age=config['REPLICA_STICKY_SECONDS'],
+                                httponly=True)
+        return response
@@ -0,0 +1,121 @@
+#----------------------------------------------------------------------------#
+# EXPLAIN plans for the main route queries.
+#
+# `flask explain-queries` prints the plan of every query below and exits with
+# an error when one of them reads the whole Show table, so a dropped or unused
+# index is caught before it reaches production.
+#----------------------------------------------------------------------------#
+
+import datetime
+import re
+import sys
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+import counters
+import queries
+from models import db, Venue, Show
+from pagination import keyset_filter
+
+# Plan lines that mean a full read of the Show table
+FULL_SCANS = {
+    'sqlite': re.compile(r'^SCAN (TABLE )?Show( AS \w+)?$'),
+    'postgresql': re.compile(r'Seq Scan on "Show"'),
+}
+
+
+class Explain(Executable, ClauseElement):
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = 'EXPLAIN QUERY PLAN ' if compiler.dialect.name == 'sqlite' \
+        else 'EXPLAIN '
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def route_queries(now=None):
+    # The statements behind the hot routes and jobs, with sample parameters
+    now = now or datetime.datetime.now()
+    show_page = queries.shows_query().filter(
+        keyset_filter((Show.start_time, Show.id), (now, 0))
+    ).order_by(Show.start_time, Show.id).limit(50)
+    return [
+        ('venues', queries.venue_areas_query().order_by(
+            *queries.VENUE_AREA_ORDER).limit(50).statement),
+        ('show_venue', queries.venue_detail_query(1).statement),
+        ('show_artist', queries.artist_detail_query(1).statement),
+        ('shows', show_page.statement),
+        ('browse_genre', queries.genre_shows_query('Jazz', now).limit(
+            50).statement),
+        ('venue_conflict', queries.venue_bookings(
+            [(1, now, now + datetime.timedelta(hours=2))]).statement),
+        ('availability', queries.availability_query(
+            queries.city_venue_ids('San Francisco', 'CA'),
+            now, now + datetime.timedelta(days=7)).statement),
+        # The SELECT side of the rollover UPDATE
+        ('counters_rollover', select(
+            [Venue.id] + list(counters.recount_values(
+                Venue, Show.venue_id, now).values())
+        ).where(Venue.id.in_(select([Show.venue_id]).where(and_(
+            Show.start_time >= now - datetime.timedelta(hours=1),
+            Show.start_time < now))))),
+    ]
+
+
+def plan_lines(statement):
+    result = db.session.execute(Explain(statement))
+    if db.engine.dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in result]
+    return [row[0] for row in result]
+
+
+def capture_plans():
+    # {name: [plan line, ...]} for every route query
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # On small tables the planner prefers a sequential scan even when an
+        # index fits; disabling it makes a missing index show up as the only
+        # plan left
+        db.session.execute('SET LOCAL enable_seqscan = off')
+    try:
+        return {name: plan_lines(statement)
+                for name, statement in route_queries()}
+    finally:
+        db.session.rollback()
+
+
+def full_scans(plans):
+    # {name: [offending plan line, ...]} for queries that read all of Show
+    pattern = FULL_SCANS.get(db.engine.dialect.name)
+    if pattern is None:
+        return {}
+    found = {}
+    for name, lines in plans.items():
+        offending = [line for line in lines if pattern.search(line.strip())]
+        if offending:
+            found[name] = offending
+    return found
+
+
+def init_app(app):
+    @app.cli.command('explain-queries')
+    def explain_queries_command():
+        """Print the plans of the route queries and fail on Show table scans."""
+        plans = capture_plans()
+        for name, lines in plans.items():
+            print('== {}'.format(name))
+            for line in lines:
+                print('   {}'.format(line))
+        scans = full_scans(plans)
+        for name, lines in scans.items():
+            print('Full Show scan in {}: {}'.format(name, '; '.join(lines)),
+                  file=sys.stderr)
+        if scans:
+            sys.exit(1)
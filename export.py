@@ -0,0 +1,145 @@
+#----------------------------------------------------------------------------#
+# Streaming export of venues, artists and shows.
+#
+# Rows are read through a server-side cursor (yield_per) and encoded as CSV or
+# NDJSON a batch at a time, so memory stays flat however large the table is.
+# /export/<kind>.<format> streams the dump with chunked transfer encoding,
+# gzipped when the client accepts it; `flask export` writes the same bytes to
+# a file or stdout.
+#----------------------------------------------------------------------------#
+
+import csv
+import datetime
+import io
+import json
+import sys
+import zlib
+
+import click
+from flask import abort, current_app, request, stream_with_context
+from sqlalchemy import select
+
+from database import read_only
+from models import db, Artist, Genre, Show, Venue, artist_genres, venue_genres
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def genre_names(association, column, entity_id):
+    # The entity's genres as one comma separated value, from the association
+    # index; string_agg on Postgres, group_concat elsewhere
+    if db.engine.dialect.name == 'postgresql':
+        aggregate = db.func.string_agg(Genre.name, ',')
+    else:
+        aggregate = db.func.group_concat(Genre.name, ',')
+    return select([aggregate]).select_from(
+        association.join(Genre, Genre.id == association.c.genre_id)
+    ).where(association.c[column] == entity_id).as_scalar().label('genres')
+
+
+def export_query(kind):
+    # Every column of the table plus the genres, in primary key order
+    if kind == 'venues':
+        columns = list(Venue.__table__.c) + [
+            genre_names(venue_genres, 'venue_id', Venue.id)]
+        order = Venue.id
+    elif kind == 'artists':
+        columns = list(Artist.__table__.c) + [
+            genre_names(artist_genres, 'artist_id', Artist.id)]
+        order = Artist.id
+    else:
+        columns = list(Show.__table__.c)
+        order = Show.id
+    return db.session.query(*columns).order_by(order)
+
+
+def encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_rows(query, file_format, batch_size):
+    # Yield the dump as text, batch_size rows per piece
+    keys = [column['name'] for column in query.column_descriptions]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if file_format == 'csv' else None
+    if writer:
+        writer.writerow(keys)
+
+    count = 0
+    for row in query.yield_per(batch_size):
+        values = [encode_value(value) for value in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(keys, values))))
+            buffer.write('\n')
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_bytes(pieces, compress=False):
+    # UTF-8 encode the pieces, gzipping them as one stream when asked
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def dump(kind, file_format, compress=False, batch_size=None):
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    return encode_bytes(
+        encode_rows(export_query(kind), file_format, batch_size), compress)
+
+
+def init_app(app):
+    @app.route('/export/<kind>.<file_format>')
+    @read_only
+    def export(kind, file_format):
+        if kind not in ('venues', 'artists', 'shows') or \
+                file_format not in FORMATS:
+            abort(404)
+        compress = bool(request.accept_encodings['gzip'])
+        # No Content-Length, so the server sends the body chunked; the
+        # request context (and its session) lives until the last row is sent
+        response = app.response_class(
+            stream_with_context(dump(kind, file_format, compress)),
+            mimetype=FORMATS[file_format])
+        response.headers['Content-Disposition'] = \
+            'attachment; filename={}.{}'.format(kind, file_format)
+        response.vary.add('Accept-Encoding')
+        if compress:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    @app.cli.command('export')
+    @click.argument('kind', type=click.Choice(['artists', 'shows', 'venues']))
+    @click.option('--format', 'file_format', type=click.Choice(sorted(FORMATS)),
+                  default='csv', show_default=True)
+    @click.option('--output', '-o', type=click.Path(dir_okay=False),
+                  help='File to write; stdout by default.')
+    @click.option('--gzip', 'compress', is_flag=True,
+                  help='Gzip the output.')
+    def export_command(kind, file_format, output, compress):
+        """Stream every venue, artist or show as CSV or NDJSON."""
+        out = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for data in dump(kind, file_format, compress):
+                out.write(data)
+        finally:
+            if output:
+                out.close()
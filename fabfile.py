@@ -4,10 +4,19 @@ from fabric.contrib.console import confirm
 # prepare for deployment
 
 
+BENCH_DATABASE = "sqlite:////tmp/fyyur-bench.db"
+
+
 def test():
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m benchmarks.query_budgets && "
+            "python -m benchmarks.replicas && "
+            "rm -f /tmp/fyyur-bench.db && "
+            "export DATABASE_URL={0} && "
+            "python -m benchmarks.seed && python -m benchmarks.routes && "
+            "python -m benchmarks.startup".format(
+                BENCH_DATABASE), capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
@@ -39,9 +48,7 @@ def heroku():
 
 
 def heroku_test():
-    local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
-    )
+    local("heroku run flask explain-queries")
 
 
 def deploy():
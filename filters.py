@@ -0,0 +1,39 @@
+#----------------------------------------------------------------------------#
+# Jinja filters.
+#----------------------------------------------------------------------------#
+
+from functools import lru_cache
+
+import babel.dates
+import dateutil.parser
+from babel import Locale
+
+LOCALE = Locale.parse('en')
+
+# Named formats, parsed once instead of on every call
+DATETIME_PATTERNS = {
+    'full': babel.dates.parse_pattern("EEEE MMMM, d, y 'at' h:mma"),
+    'medium': babel.dates.parse_pattern("EE MM, dd, y h:mma"),
+}
+
+# Listing pages format the same show times over and over
+DATETIME_MEMO_SIZE = 4096
+
+
+@lru_cache(maxsize=DATETIME_MEMO_SIZE)
+def _format_datetime(date, format):
+    pattern = DATETIME_PATTERNS.get(format)
+    if pattern is None:
+        return babel.dates.format_datetime(date, format, locale=LOCALE)
+    return pattern.apply(date, LOCALE)
+
+
+def format_datetime(value, format='medium'):
+    # Routes pass datetime objects; strings are still accepted and parsed
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    return _format_datetime(value, format)
+
+
+def init_app(app):
+    app.jinja_env.filters['datetime'] = format_datetime
@@ -0,0 +1,395 @@
+#----------------------------------------------------------------------------#
+# Bulk import of venues, artists and shows.
+#
+# `flask import <kind> <file>` streams a CSV or JSONL file, validates every row
+# with the same form the HTML pages use and writes the valid rows in chunks:
+# COPY on Postgres, one executemany INSERT elsewhere. Memory stays bounded by
+# the chunk size. Each chunk commits together with the file's checkpoint, so an
+# interrupted import picks up after the last committed chunk when run again.
+# Rejected rows go to a JSONL file next to the input with their form errors.
+#----------------------------------------------------------------------------#
+
+import bisect
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+
+import click
+from sqlalchemy import func, select
+from werkzeug.datastructures import MultiDict
+from wtforms import BooleanField
+
+import cache
+import counters
+import queries
+from forms import ArtistForm, ShowImportForm, VenueForm
+from models import (db, Artist, Genre, ImportCheckpoint, Show, Venue,
+                    artist_genres, venue_genres)
+
+# kind: (form, model, genre association table, association column)
+KINDS = {
+    'venues': (VenueForm, Venue, venue_genres, 'venue_id'),
+    'artists': (ArtistForm, Artist, artist_genres, 'artist_id'),
+    'shows': (ShowImportForm, Show, None, None),
+}
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'on'}
+
+
+class Reject(Exception):
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+#----------------------------------------------------------------------------#
+# Reading and validation.
+#----------------------------------------------------------------------------#
+
+def read_rows(path, file_format):
+    # Yield the records of the file one at a time
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line.rstrip('\n')
+
+
+def formdata(form_class, row):
+    # The row as the form would receive it from a browser: genres as repeated
+    # values (a JSON list or a comma separated cell), checkboxes only when
+    # set. Blank values are sent as empty strings, so a required field fails
+    # instead of falling back to its default.
+    data = MultiDict()
+    for name, value in row.items():
+        field = getattr(form_class, name, None)
+        if field is None:
+            continue
+        if value is None or value == '':
+            if name != 'genres' and field.field_class is not BooleanField:
+                data.add(name, '')
+            continue
+        if name == 'genres':
+            names = value if isinstance(value, list) else value.split(',')
+            for genre in names:
+                data.add(name, str(genre).strip())
+        elif field.field_class is BooleanField:
+            if value is True or str(value).strip().lower() in TRUE_VALUES:
+                data.add(name, 'y')
+        else:
+            data.add(name, str(value))
+    return data
+
+
+def validate(kind, row):
+    # The column values of a valid row; raises Reject otherwise
+    form_class, model, _, _ = KINDS[kind]
+    if not isinstance(row, dict):
+        raise Reject({'row': ['not a JSON object']})
+    form = form_class(formdata=formdata(form_class, row), meta={'csrf': False})
+    if not form.validate():
+        raise Reject(form.errors)
+
+    values = {name: value for name, value in form.data.items()
+              if name in model.__table__.c}
+    try:
+        if kind == 'shows':
+            values['artist_id'] = int(values['artist_id'])
+            values['venue_id'] = int(values['venue_id'])
+        else:
+            values['id'] = int(row['id']) if row.get('id') not in (None, '') \
+                else None
+            values['genres'] = form.genres.data
+    except ValueError:
+        raise Reject({'id': ['not an integer']})
+    return values
+
+
+#----------------------------------------------------------------------------#
+# Writing.
+#----------------------------------------------------------------------------#
+
+def existing_ids(model, ids):
+    # The subset of ids already in the model's table, in one IN query
+    ids = set(ids)
+    if not ids:
+        return set()
+    return {row[0] for row in db.session.execute(
+        select([model.id]).where(model.id.in_(ids)))}
+
+
+def assign_ids(table, rows):
+    # Give rows without an id one from the table's sequence so their genre
+    # rows can reference them before the insert
+    missing = [row for row in rows if row['id'] is None]
+    explicit = max([row['id'] for row in rows if row['id'] is not None],
+                   default=0)
+    if db.engine.dialect.name == 'postgresql':
+        sequence = "pg_get_serial_sequence('\"{}\"', 'id')".format(table.name)
+        if explicit:
+            # Keep the sequence ahead of ids supplied by the file
+            db.session.execute(
+                'SELECT setval({0}, GREATEST(:explicit, '
+                '(SELECT coalesce(max(id), 1) FROM "{1}")))'.format(
+                    sequence, table.name), {'explicit': explicit})
+        if missing:
+            ids = [row[0] for row in db.session.execute(
+                'SELECT nextval({}) FROM generate_series(1, :n)'.format(
+                    sequence), {'n': len(missing)})]
+        else:
+            ids = []
+    else:
+        # Assumes nothing else inserts into the table while the import runs
+        start = max(explicit, db.session.execute(
+            select([func.coalesce(func.max(table.c.id), 0)])).scalar())
+        ids = range(start + 1, start + 1 + len(missing))
+    for row, new_id in zip(missing, ids):
+        row['id'] = new_id
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(' ')
+    return value
+
+
+def insert_rows(table, rows):
+    if not rows:
+        return
+    if db.engine.dialect.name != 'postgresql':
+        db.session.execute(table.insert(), rows)
+        return
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    # COPY through the session's own connection so it shares the transaction
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        'COPY "{}" ({}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'.format(
+            table.name, ', '.join('"{}"'.format(column) for column in columns)),
+        buffer)
+
+
+def write_entities(kind, rows, rejects):
+    # Venues or artists plus their genre rows; rows with an id already taken
+    # are rejected here since one conflict would abort the whole chunk
+    _, model, association, column = KINDS[kind]
+    taken = existing_ids(model, [row['id'] for _, row in rows if row['id']])
+    seen = set()
+    accepted = []
+    for number, row in rows:
+        if row['id'] in taken or row['id'] in seen:
+            rejects.append((number, {'id': ['already exists']}))
+            continue
+        if row['id'] is not None:
+            seen.add(row['id'])
+        accepted.append(row)
+
+    assign_ids(model.__table__, accepted)
+    genres = Genre.lookup(
+        name for row in accepted for name in row['genres'])
+    db.session.add_all(genres)
+    db.session.flush()
+    genre_ids = {genre.name: genre.id for genre in genres}
+
+    now = datetime.datetime.utcnow()
+    links = []
+    for row in accepted:
+        links += [{'genre_id': genre_ids[name], column: row['id']}
+                  for name in dict.fromkeys(row.pop('genres'))]
+        row.update(num_upcoming_shows=0, num_past_shows=0, updated_at=now)
+    insert_rows(model.__table__, accepted)
+    insert_rows(association, links)
+    return len(accepted)
+
+
+def show_end(row):
+    return row['start_time'] + datetime.timedelta(
+        minutes=row['duration_minutes'])
+
+
+def chunk_bookings(rows):
+    # {venue_id: sorted (start, end, id)} of the booked shows that may overlap
+    # the rows, from one query spanning each venue's rows in the chunk
+    windows = {}
+    for _, row in rows:
+        start, end = row['start_time'], show_end(row)
+        low, high = windows.get(row['venue_id'], (start, end))
+        windows[row['venue_id']] = (min(low, start), max(high, end))
+    bookings = {venue_id: [] for venue_id in windows}
+    if windows:
+        for show in queries.venue_bookings(
+                [(venue_id,) + window for venue_id, window in windows.items()]):
+            bookings[show.venue_id].append(queries.booking(show))
+    return bookings
+
+
+def check_shows(rows, rejects):
+    # The shows whose venue and artist exist and whose venue is free; three
+    # statements however many rows there are
+    venues = existing_ids(Venue, [row['venue_id'] for _, row in rows])
+    artists = existing_ids(Artist, [row['artist_id'] for _, row in rows])
+    bookings = chunk_bookings(rows)
+    now = datetime.datetime.utcnow()
+    accepted = []
+    for number, row in rows:
+        errors = {}
+        if row['venue_id'] not in venues:
+            errors['venue_id'] = ['no such venue']
+        if row['artist_id'] not in artists:
+            errors['artist_id'] = ['no such artist']
+        # Against the booked shows and the rows accepted before this one
+        booked = bookings[row['venue_id']]
+        conflict = queries.find_overlap(
+            booked, row['start_time'], show_end(row))
+        if conflict:
+            errors['start_time'] = [
+                'the venue is already booked from {} to {}'.format(
+                    *conflict[:2])]
+        if errors:
+            rejects.append((number, errors))
+            continue
+        bisect.insort(booked, (row['start_time'], show_end(row), 0))
+        row['updated_at'] = now
+        accepted.append(row)
+    return accepted
+
+
+def insert_shows(accepted):
+    # Checked shows, then the counters of everything they touch; the caller
+    # commits and then calls invalidate_shows()
+    insert_rows(Show.__table__, accepted)
+    # Bulk inserts skip the Show mapper events that keep the counters
+    counters.refresh([row['venue_id'] for row in accepted],
+                     [row['artist_id'] for row in accepted])
+    return len(accepted)
+
+
+def invalidate_shows(rows):
+    # Only after the commit: a read in between would cache the pages again
+    # without the new shows
+    cache.invalidate([row['venue_id'] for row in rows],
+                     [row['artist_id'] for row in rows])
+
+
+def write_shows(rows, rejects):
+    # The inserted rows
+    accepted = check_shows(rows, rejects)
+    insert_shows(accepted)
+    return accepted
+
+
+def create_show_batch(records, rejects):
+    # Shows booked together, e.g. a tour: every (number, record) is checked
+    # and the batch is inserted in one transaction only when no row, nor any
+    # already in rejects, was rejected. Returns the number of shows created.
+    valid = []
+    for number, record in records:
+        try:
+            valid.append((number, validate('shows', record)))
+        except Reject as reject:
+            rejects.append((number, reject.errors))
+    accepted = check_shows(valid, rejects)
+    if rejects:
+        db.session.rollback()
+        rejects.sort(key=lambda reject: reject[0])
+        return 0
+    created = insert_shows(accepted)
+    db.session.commit()
+    invalidate_shows(accepted)
+    return created
+
+
+#----------------------------------------------------------------------------#
+# Driver.
+#----------------------------------------------------------------------------#
+
+def import_file(kind, path, file_format, chunk_size, rejects_path,
+                restart=False):
+    # Returns (imported, rejected) for this run
+    source = '{}:{}'.format(kind, os.path.abspath(path))
+    checkpoint = ImportCheckpoint.query.get(source)
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(source=source, position=0)
+        db.session.add(checkpoint)
+    elif restart:
+        checkpoint.position = 0
+    start = checkpoint.position
+
+    imported = rejected = 0
+    records = enumerate(read_rows(path, file_format), start=1)
+    records = itertools.islice(records, start, None)
+    with open(rejects_path, 'a' if start else 'w', encoding='utf-8') as out:
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            valid, rejects = [], []
+            for number, row in chunk:
+                try:
+                    valid.append((number, validate(kind, row)))
+                except Reject as reject:
+                    rejects.append((number, reject.errors))
+
+            shows = []
+            if kind == 'shows':
+                shows = write_shows(valid, rejects)
+                imported += len(shows)
+            else:
+                imported += write_entities(kind, valid, rejects)
+
+            rows = dict(chunk)
+            for number, errors in sorted(rejects):
+                out.write(json.dumps({'line': number, 'row': rows[number],
+                                      'errors': errors}) + '\n')
+            out.flush()
+            rejected += len(rejects)
+
+            checkpoint.position = chunk[-1][0]
+            db.session.commit()
+            invalidate_shows(shows)
+    db.session.commit()
+    return imported, rejected
+
+
+def init_app(app):
+    @app.cli.command('import')
+    @click.argument('kind', type=click.Choice(sorted(KINDS)))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+                  help='Input format; defaults to the file extension.')
+    @click.option('--chunk-size', type=int, default=None,
+                  help='Rows per INSERT / COPY and per commit.')
+    @click.option('--rejects', 'rejects_path',
+                  type=click.Path(dir_okay=False),
+                  help='Where to write rejected rows (JSONL).')
+    @click.option('--restart', is_flag=True,
+                  help='Ignore the checkpoint and start from the first row.')
+    def import_command(kind, path, file_format, chunk_size, rejects_path,
+                       restart):
+        """Bulk import venues, artists or shows from a CSV or JSONL file."""
+        if file_format is None:
+            file_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        rejects_path = rejects_path or path + '.rejects.jsonl'
+        imported, rejected = import_file(
+            kind, path, file_format,
+            chunk_size or app.config['IMPORT_CHUNK_SIZE'], rejects_path,
+            restart)
+        print('Imported {} {}, rejected {}.'.format(imported, kind, rejected))
+        if rejected:
+            print('Rejected rows are in {}.'.format(rejects_path))
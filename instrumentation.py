@@ -0,0 +1,198 @@
+#----------------------------------------------------------------------------#
+# Per-request SQL instrumentation.
+#
+# Every request records its SQL statement count, time spent in the database,
+# time spent rendering templates and wall time. A statement shape that runs
+# more than N_PLUS_ONE_THRESHOLD times in one request is logged as a likely
+# N+1 query. The numbers go into a Server-Timing header when
+# REQUEST_STATS_HEADERS is on, and are aggregated per endpoint at /metrics in
+# the Prometheus text format together with the page cache counters.
+# Statements run while a streamed response body is sent are not counted.
+#----------------------------------------------------------------------------#
+
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import (before_render_template, g, has_request_context, request,
+                   template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import cache
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Expanded IN lists vary in length; one shape covers them all
+IN_LIST = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)')
+
+
+def statement_shape(statement):
+    return IN_LIST.sub('(?)', ' '.join(statement.split()))
+
+
+class Metrics(object):
+    # Totals per (endpoint, method, status) since the process started
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.seconds = Counter()
+        self.statements = Counter()
+        self.sql_seconds = Counter()
+        self.render_seconds = Counter()
+        self.n_plus_one = Counter()
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+
+    def record(self, labels, stats, suspects):
+        with self._lock:
+            self.requests[labels] += 1
+            self.seconds[labels] += stats['total']
+            self.statements[labels] += stats['statements']
+            self.sql_seconds[labels] += stats['sql']
+            self.render_seconds[labels] += stats['render']
+            self.n_plus_one[labels] += len(suspects)
+            buckets = self.buckets[labels]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if stats['total'] <= bound:
+                    buckets[index] += 1
+
+    def render(self, page_cache_stats):
+        # The Prometheus text exposition format
+        lines = []
+
+        def family(name, kind, help_text, samples, suffix=''):
+            lines.append('# HELP {} {}'.format(name, help_text))
+            lines.append('# TYPE {} {}'.format(name, kind))
+            for labels, value in samples:
+                lines.append('{}{}{} {}'.format(
+                    name, suffix, format_labels(labels), value))
+
+        with self._lock:
+            keys = sorted(self.requests)
+            family('fyyur_requests_total', 'counter', 'Requests served.',
+                   [(key, self.requests[key]) for key in keys])
+            family('fyyur_sql_statements_total', 'counter',
+                   'SQL statements run by requests.',
+                   [(key, self.statements[key]) for key in keys])
+            family('fyyur_sql_seconds_total', 'counter',
+                   'Time requests spent in SQL statements.',
+                   [(key, round(self.sql_seconds[key], 6)) for key in keys])
+            family('fyyur_render_seconds_total', 'counter',
+                   'Time requests spent rendering templates.',
+                   [(key, round(self.render_seconds[key], 6)) for key in keys])
+            family('fyyur_n_plus_one_total', 'counter',
+                   'Statement shapes repeated past the N+1 threshold.',
+                   [(key, self.n_plus_one[key]) for key in keys])
+
+            samples = []
+            for key in keys:
+                for bound, count in zip(DURATION_BUCKETS, self.buckets[key]):
+                    samples.append((key + (('le', str(bound)),), count))
+                samples.append((key + (('le', '+Inf'),), self.requests[key]))
+            family('fyyur_request_duration_seconds', 'histogram',
+                   'Request wall time.', samples, suffix='_bucket')
+            lines += ['fyyur_request_duration_seconds_sum{} {}'.format(
+                format_labels(key), round(self.seconds[key], 6)) for key in keys]
+            lines += ['fyyur_request_duration_seconds_count{} {}'.format(
+                format_labels(key), self.requests[key]) for key in keys]
+
+        family('fyyur_page_cache_hits_total', 'counter', 'Page cache hits.',
+               [((), page_cache_stats['hits'])])
+        family('fyyur_page_cache_misses_total', 'counter',
+               'Page cache misses.', [((), page_cache_stats['misses'])])
+        if 'entries' in page_cache_stats:
+            family('fyyur_page_cache_entries', 'gauge', 'Cached pages.',
+                   [((), page_cache_stats['entries'])])
+            family('fyyur_page_cache_bytes', 'gauge', 'Size of cached pages.',
+                   [((), page_cache_stats['bytes'])])
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(
+        name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in labels) + '}'
+
+
+#----------------------------------------------------------------------------#
+# Hooks.
+#----------------------------------------------------------------------------#
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_shapes' in g:
+        g.sql_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_shapes' in g:
+        g.sql_seconds += time.perf_counter() - g.sql_started
+        g.sql_shapes[statement_shape(statement)] += 1
+
+
+def _before_render(app, template, context):
+    g.render_started = time.perf_counter()
+
+
+def _rendered(app, template, context):
+    if 'render_started' in g and 'render_seconds' in g:
+        g.render_seconds += time.perf_counter() - g.render_started
+
+
+def request_stats():
+    return {
+        'statements': sum(g.sql_shapes.values()),
+        'sql': g.sql_seconds,
+        'render': g.render_seconds,
+        'total': time.perf_counter() - g.request_started,
+    }
+
+
+def init_app(app):
+    metrics = app.extensions['request_metrics'] = Metrics()
+    if not event.contains(Engine, 'before_cursor_execute', _before_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    @app.before_request
+    def start_request_stats():
+        g.request_started = time.perf_counter()
+        g.sql_shapes = Counter()
+        g.sql_seconds = 0.0
+        g.render_seconds = 0.0
+
+    @app.after_request
+    def record_request_stats(response):
+        if 'sql_shapes' not in g:
+            return response
+        stats = request_stats()
+        threshold = app.config['N_PLUS_ONE_THRESHOLD']
+        suspects = [(shape, count) for shape, count in g.sql_shapes.items()
+                    if count > threshold]
+        for shape, count in suspects:
+            app.logger.warning('Possible N+1 in %s: %d x %s',
+                               request.endpoint, count, shape)
+
+        metrics.record((('endpoint', request.endpoint or 'unknown'),
+                        ('method', request.method),
+                        ('status', response.status_code)), stats, suspects)
+        if app.config['REQUEST_STATS_HEADERS']:
+            response.headers['Server-Timing'] = ', '.join([
+                'db;dur={:.2f};desc="statements={}"'.format(
+                    stats['sql'] * 1000, stats['statements']),
+                'render;dur={:.2f}'.format(stats['render'] * 1000),
+                'total;dur={:.2f}'.format(stats['total'] * 1000),
+            ])
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return app.response_class(
+            metrics.render(cache.get_cache().stats()),
+            content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,29 @@
+"""venue area index for the venues listing
+
+Revision ID: 1b6e93d4f7a2
+Revises: d95a3b7e0c14
+Create Date: 2026-10-18 21:05:37.214508
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b6e93d4f7a2'
+down_revision = 'd95a3b7e0c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The listing pages by (state, city, name, id); the index also covers the
+    # lookups by city that ix_Venue_state_city served
+    op.create_index('ix_Venue_state_city_name_id', 'Venue',
+                    ['state', 'city', 'name', 'id'])
+    op.drop_index('ix_Venue_state_city', table_name='Venue')
+
+
+def downgrade():
+    op.create_index('ix_Venue_state_city', 'Venue', ['state', 'city'])
+    op.drop_index('ix_Venue_state_city_name_id', table_name='Venue')
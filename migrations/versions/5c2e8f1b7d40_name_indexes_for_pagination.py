@@ -0,0 +1,26 @@
+"""name indexes for keyset pagination
+
+Revision ID: 5c2e8f1b7d40
+Revises: aa9615ca9a7b
+Create Date: 2026-10-18 09:12:41.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8f1b7d40'
+down_revision = 'aa9615ca9a7b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Venue_name_id', 'Venue', ['name', 'id'])
+    op.create_index('ix_Artist_name_id', 'Artist', ['name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_id', table_name='Artist')
+    op.drop_index('ix_Venue_name_id', table_name='Venue')
@@ -0,0 +1,75 @@
+"""search indexes for venues and artists
+
+Revision ID: 8d41a7c3e2f9
+Revises: 5c2e8f1b7d40
+Create Date: 2026-10-18 10:03:17.226470
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41a7c3e2f9'
+down_revision = '5c2e8f1b7d40'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ['name', 'city', 'state']
+
+FTS_TABLES = {
+    'Venue': 'venue_fts',
+    'Artist': 'artist_fts',
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Trigram GIN indexes let ILIKE '%term%' use an index scan
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in FTS_TABLES:
+            for column in SEARCH_COLUMNS:
+                op.create_index(
+                    'ix_%s_%s_trgm' % (table, column), table, [column],
+                    postgresql_using='gin',
+                    postgresql_ops={column: 'gin_trgm_ops'})
+
+    elif op.get_bind().dialect.name == 'sqlite':
+        # External-content FTS5 tables over the trigram tokenizer, kept in
+        # sync with their content table by triggers
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join('new.' + column for column in SEARCH_COLUMNS)
+        old_values = ', '.join('old.' + column for column in SEARCH_COLUMNS)
+        for table, fts in FTS_TABLES.items():
+            op.execute(
+                "CREATE VIRTUAL TABLE %s USING fts5(%s, content='%s', "
+                "content_rowid='id', tokenize='trigram')"
+                % (fts, columns, table))
+            op.execute(
+                'CREATE TRIGGER %s_ai AFTER INSERT ON "%s" BEGIN '
+                'INSERT INTO %s(rowid, %s) VALUES (new.id, %s); END'
+                % (fts, table, fts, columns, new_values))
+            op.execute(
+                'CREATE TRIGGER %s_ad AFTER DELETE ON "%s" BEGIN '
+                "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s); END"
+                % (fts, table, fts, fts, columns, old_values))
+            op.execute(
+                'CREATE TRIGGER %s_au AFTER UPDATE OF %s ON "%s" BEGIN '
+                "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.id, %s); "
+                'INSERT INTO %s(rowid, %s) VALUES (new.id, %s); END'
+                % (fts, columns, table, fts, fts, columns, old_values,
+                   fts, columns, new_values))
+            op.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (fts, fts))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in FTS_TABLES:
+            for column in SEARCH_COLUMNS:
+                op.drop_index('ix_%s_%s_trgm' % (table, column), table_name=table)
+
+    elif op.get_bind().dialect.name == 'sqlite':
+        for fts in FTS_TABLES.values():
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute('DROP TRIGGER IF EXISTS %s_%s' % (fts, suffix))
+            op.execute('DROP TABLE IF EXISTS %s' % fts)
@@ -0,0 +1,29 @@
+"""import checkpoints
+
+Revision ID: a3f07d5c91b4
+Revises: f2d85c6a9e17
+Create Date: 2026-10-18 15:11:08.402517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f07d5c91b4'
+down_revision = 'f2d85c6a9e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_checkpoint',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade():
+    op.drop_table('import_checkpoint')
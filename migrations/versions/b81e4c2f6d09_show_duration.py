@@ -0,0 +1,67 @@
+"""show duration and venue overlap constraint
+
+Revision ID: b81e4c2f6d09
+Revises: a3f07d5c91b4
+Create Date: 2026-10-18 16:27:45.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81e4c2f6d09'
+down_revision = 'a3f07d5c91b4'
+branch_labels = None
+depends_on = None
+
+# Matches MAX_SHOW_MINUTES in models.py
+MAX_SHOW_MINUTES = 24 * 60
+
+SHOW_RANGE = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+
+# A sample of the overlapping pairs that would make the constraint fail
+OVERLAPS = '''
+SELECT a.id, b.id, a.venue_id
+FROM "Show" a JOIN "Show" b ON b.venue_id = a.venue_id AND b.id > a.id
+WHERE b.start_time < a.start_time + a.duration_minutes * interval '1 minute'
+  AND a.start_time < b.start_time + b.duration_minutes * interval '1 minute'
+LIMIT 20
+'''
+
+
+def upgrade():
+    # Every existing show gets the default two hours
+    op.add_column('Show', sa.Column('duration_minutes', sa.Integer(),
+                                    nullable=False, server_default='120'))
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite cannot add constraints to a live table; the forms and the
+        # importer enforce the bounds and overlaps there
+        return
+
+    op.create_check_constraint(
+        'ck_Show_duration_minutes', 'Show',
+        'duration_minutes BETWEEN 1 AND {}'.format(MAX_SHOW_MINUTES))
+
+    overlaps = op.get_bind().execute(sa.text(OVERLAPS)).fetchall()
+    if overlaps:
+        raise RuntimeError(
+            'Overlapping shows must be fixed before the exclusion constraint '
+            'can be added (show id, show id, venue id): {}'.format(
+                ', '.join(str(tuple(row)) for row in overlaps)))
+
+    # Two shows at one venue may not share a minute; btree_gist lets the
+    # integer venue_id take part in the GiST index behind the constraint
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        'ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_venue_overlap" '
+        'EXCLUDE USING gist (venue_id WITH =, {} WITH &&)'.format(SHOW_RANGE))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('ex_Show_venue_overlap', 'Show')
+        op.drop_constraint('ck_Show_duration_minutes', 'Show')
+        op.drop_column('Show', 'duration_minutes')
+    else:
+        op.execute('ALTER TABLE "Show" DROP COLUMN duration_minutes')
@@ -0,0 +1,46 @@
+"""composite indexes on Show
+
+Revision ID: c7a9e0d35b12
+Revises: 8d41a7c3e2f9
+Create Date: 2026-10-18 11:20:54.941362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a9e0d35b12'
+down_revision = '8d41a7c3e2f9'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_Show_venue_id_start_time', ['venue_id', 'start_time']),
+    ('ix_Show_artist_id_start_time', ['artist_id', 'start_time']),
+    ('ix_Show_start_time', ['start_time']),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY does not lock out writes on a live table,
+        # but it cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES:
+                op.create_index(name, 'Show', columns,
+                                postgresql_concurrently=True)
+    else:
+        for name, columns in INDEXES:
+            op.create_index(name, 'Show', columns)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES:
+                op.drop_index(name, table_name='Show',
+                              postgresql_concurrently=True)
+    else:
+        for name, columns in INDEXES:
+            op.drop_index(name, table_name='Show')
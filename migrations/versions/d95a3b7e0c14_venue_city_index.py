@@ -0,0 +1,24 @@
+"""venue city index for availability
+
+Revision ID: d95a3b7e0c14
+Revises: b81e4c2f6d09
+Create Date: 2026-10-18 17:40:12.660947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd95a3b7e0c14'
+down_revision = 'b81e4c2f6d09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Venue_state_city', 'Venue', ['state', 'city'])
+
+
+def downgrade():
+    op.drop_index('ix_Venue_state_city', table_name='Venue')
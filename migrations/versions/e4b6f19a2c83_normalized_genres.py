@@ -0,0 +1,107 @@
+"""normalized genres
+
+Revision ID: e4b6f19a2c83
+Revises: c7a9e0d35b12
+Create Date: 2026-10-18 12:41:08.117305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b6f19a2c83'
+down_revision = 'c7a9e0d35b12'
+branch_labels = None
+depends_on = None
+
+GENRES = [
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul',
+    'Other',
+]
+
+ENTITIES = [
+    ('Venue', 'venue_genres', 'venue_id'),
+    ('Artist', 'artist_genres', 'artist_id'),
+]
+
+
+def parse_genres(value):
+    # The old column held either "Jazz,Rock" or a Postgres array literal
+    # such as {Jazz,"Rock n Roll"}
+    if not value:
+        return []
+    value = value.strip().lstrip('{').rstrip('}')
+    return [name.strip().strip('"') for name in value.split(',')
+            if name.strip().strip('"')]
+
+
+def drop_genres_column(table):
+    if op.get_bind().dialect.name == 'sqlite':
+        # A native DROP COLUMN keeps the search triggers on the table, which a
+        # batch table rebuild would lose
+        op.execute('ALTER TABLE "%s" DROP COLUMN genres' % table)
+    else:
+        op.drop_column(table, 'genres')
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for table, association, foreign_key in ENTITIES:
+        op.create_table(association,
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.Column(foreign_key, sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ),
+        sa.ForeignKeyConstraint([foreign_key], ['%s.id' % table], ),
+        sa.PrimaryKeyConstraint('genre_id', foreign_key)
+        )
+        op.create_index('ix_%s_%s' % (association, foreign_key), association,
+                        [foreign_key])
+
+    op.bulk_insert(genre, [{'name': name} for name in GENRES])
+
+    # Move the genre strings into the association tables
+    connection = op.get_bind()
+    genre_ids = dict(connection.execute(
+        sa.text('SELECT name, id FROM "Genre"')).fetchall())
+    for table, association, foreign_key in ENTITIES:
+        rows = []
+        for entity_id, value in connection.execute(
+                sa.text('SELECT id, genres FROM "%s"' % table)):
+            for name in dict.fromkeys(parse_genres(value)):
+                if name not in genre_ids:
+                    genre_ids[name] = connection.execute(
+                        genre.insert().values(name=name)
+                    ).inserted_primary_key[0]
+                rows.append({'genre_id': genre_ids[name], foreign_key: entity_id})
+        if rows:
+            op.bulk_insert(sa.table(
+                association, sa.column('genre_id'), sa.column(foreign_key)), rows)
+        drop_genres_column(table)
+
+
+def downgrade():
+    connection = op.get_bind()
+    for table, association, foreign_key in ENTITIES:
+        op.add_column(table, sa.Column('genres', sa.String(length=120),
+                                       nullable=True))
+        names = {}
+        for entity_id, name in connection.execute(sa.text(
+                'SELECT a.%s, g.name FROM %s a JOIN "Genre" g ON g.id = a.genre_id '
+                'ORDER BY g.name' % (foreign_key, association))):
+            names.setdefault(entity_id, []).append(name)
+        for entity_id, entity_names in names.items():
+            connection.execute(sa.text(
+                'UPDATE "%s" SET genres = :genres WHERE id = :id' % table
+            ), genres=','.join(entity_names), id=entity_id)
+        op.drop_index('ix_%s_%s' % (association, foreign_key),
+                      table_name=association)
+        op.drop_table(association)
+    op.drop_table('Genre')
@@ -0,0 +1,41 @@
+"""updated_at on Venue, Artist and Show
+
+Revision ID: f2d85c6a9e17
+Revises: e4b6f19a2c83
+Create Date: 2026-10-18 14:02:36.774150
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d85c6a9e17'
+down_revision = 'e4b6f19a2c83'
+branch_labels = None
+depends_on = None
+
+TABLES = ['Venue', 'Artist', 'Show']
+
+
+def upgrade():
+    for table in TABLES:
+        # SQLite only adds NOT NULL columns with a constant default, so fill
+        # in the real time (UTC, like the model default) afterwards
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(), nullable=False,
+            server_default='1970-01-01 00:00:00'))
+        if op.get_bind().dialect.name == 'sqlite':
+            op.execute('UPDATE "%s" SET updated_at = CURRENT_TIMESTAMP' % table)
+        else:
+            op.execute("UPDATE \"%s\" SET updated_at = timezone('utc', now())"
+                       % table)
+            op.alter_column(table, 'updated_at', server_default=None)
+
+
+def downgrade():
+    for table in TABLES:
+        if op.get_bind().dialect.name == 'sqlite':
+            op.execute('ALTER TABLE "%s" DROP COLUMN updated_at' % table)
+        else:
+            op.drop_column(table, 'updated_at')
@@ -1,8 +1,11 @@
 
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, event, func, select
 import datetime
 
-db = SQLAlchemy()
+from database import RoutingSQLAlchemy
+
+# Reads of @read_only views are routed to the replicas, see database.py
+db = RoutingSQLAlchemy()
 
 
 
@@ -11,8 +14,51 @@ db = SQLAlchemy()
 # Models.
 #----------------------------------------------------------------------------#
 
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    @classmethod
+    def lookup(cls, names):
+        # Genre rows for the given names in one query, adding unknown ones
+        names = list(dict.fromkeys(names))
+        genres = cls.query.filter(cls.name.in_(names)).all()
+        known = {genre.name for genre in genres}
+        return genres + [cls(name=name) for name in names if name not in known]
+
+
+# The (genre_id, entity_id) primary keys answer "everything in genre X" from
+# the index; the second index loads the genres of one venue or artist.
+venue_genres = db.Table(
+    'venue_genres',
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'),
+              primary_key=True),
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id'),
+              primary_key=True),
+    db.Index('ix_venue_genres_venue_id', 'venue_id'),
+)
+
+artist_genres = db.Table(
+    'artist_genres',
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'),
+              primary_key=True),
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id'),
+              primary_key=True),
+    db.Index('ix_artist_genres_artist_id', 'artist_id'),
+)
+
+
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    # The venues listing is keyset-paginated on (state, city, name, id), which
+    # also serves the availability lookups by city; genre browsing walks
+    # (name, id)
+    __table_args__ = (
+        db.Index('ix_Venue_name_id', 'name', 'id'),
+        db.Index('ix_Venue_state_city_name_id', 'state', 'city', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -24,12 +70,17 @@ class Venue(db.Model):
     facebook_link = db.Column(db.String(120))
 
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
-    genres = db.Column(db.String(120), nullable=False)
+    genres = db.relationship('Genre', secondary=venue_genres, lazy=True,
+                             order_by='Genre.name')
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean,default=False)
     seeking_description = db.Column(db.String())
     num_upcoming_shows = db.Column(db.Integer, default=0)
     num_past_shows = db.Column(db.Integer, default=0)
+    # Drives the page validators (ETag / Last-Modified); stored in UTC
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)
     show = db.relationship('Show', backref='venue',
     cascade='delete,save-update',lazy=True)
 
@@ -49,13 +100,16 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    # Listing pages are keyset-paginated on (name, id)
+    __table_args__ = (db.Index('ix_Artist_name_id', 'name', 'id'),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=artist_genres, lazy=True,
+                             order_by='Genre.name')
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
@@ -65,6 +119,10 @@ class Artist(db.Model):
     seeking_description = db.Column(db.String())
     num_upcoming_shows = db.Column(db.Integer, default=0)
     num_past_shows = db.Column(db.Integer, default=0)
+    # Drives the page validators (ETag / Last-Modified); stored in UTC
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)
     show = db.relationship('Show', backref='artist',
     cascade='delete,save-update',lazy=True)
 
@@ -79,16 +137,112 @@ class Artist(db.Model):
 
 
 
+# Upper bound of Show.duration_minutes. It also bounds how far back an
+# overlapping show can start, which keeps the overlap check an index range scan.
+MAX_SHOW_MINUTES = 24 * 60
+MAX_SHOW_DURATION = datetime.timedelta(minutes=MAX_SHOW_MINUTES)
+
+
 # TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
 class Show(db.Model):
     __tablename__ = 'Show'
+    # Every hot query filters on a venue or an artist plus a start_time range,
+    # or walks shows in start_time order. On Postgres the migrations also add
+    # an exclusion constraint against overlapping shows at one venue.
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time', 'start_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     venue_id = db.Column( db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     artist_id = db.Column( db.Integer, db.ForeignKey('Artist.id'), nullable=False)
     start_time = db.Column(db.DateTime, default=datetime.datetime, nullable=False )
+    duration_minutes = db.Column(db.Integer, nullable=False, default=120,
+                                 server_default='120')
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)
     
     def create(self):
         db.session.add(self)
         db.session.commit()
- 
-  
\ No newline at end of file
+
+
+class ImportCheckpoint(db.Model):
+    # How far `flask import` got through an input file; advanced in the same
+    # transaction as each chunk it commits
+    __tablename__ = 'import_checkpoint'
+
+    source = db.Column(db.String, primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)
+
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+# Keep Venue/Artist num_upcoming_shows and num_past_shows in step with the Show
+# rows written through the ORM. Shows becoming past over time are handled by
+# the rollover job in counters.py.
+
+def recount_values(model, foreign_key, now):
+    # Both counts as scalar subqueries correlated to the venue or artist row
+    table = model.__table__
+
+    def count(condition):
+        return select([func.count(Show.id)]).where(
+            and_(foreign_key == table.c.id, condition)).as_scalar()
+
+    return {
+        'num_upcoming_shows': count(Show.start_time >= now),
+        'num_past_shows': count(Show.start_time < now),
+    }
+
+
+def _show_owners(show):
+    return ((Venue, Show.venue_id, show.venue_id),
+            (Artist, Show.artist_id, show.artist_id))
+
+
+@event.listens_for(Show, 'after_insert')
+def _count_inserted_show(mapper, connection, show):
+    # A new show is counted where it belongs now
+    upcoming = show.start_time >= datetime.datetime.now()
+    column = 'num_upcoming_shows' if upcoming else 'num_past_shows'
+    for model, _, entity_id in _show_owners(show):
+        table = model.__table__
+        connection.execute(table.update().where(
+            table.c.id == entity_id
+        ).values({
+            column: func.coalesce(table.c[column], 0) + 1
+        }))
+
+
+@event.listens_for(Show, 'after_delete')
+def _count_deleted_show(mapper, connection, show):
+    # A deleted show may have started since the last rollover while still
+    # counted as upcoming, so its venue and artist are recounted instead of
+    # decremented
+    now = datetime.datetime.now()
+    for model, foreign_key, entity_id in _show_owners(show):
+        table = model.__table__
+        connection.execute(table.update().where(
+            table.c.id == entity_id
+        ).values(recount_values(model, foreign_key, now)))
+
+
+#----------------------------------------------------------------------------#
+# Modification times.
+#----------------------------------------------------------------------------#
+
+# Column onupdate only fires when a column changes; a venue or artist whose
+# genres alone were edited still has to look modified.
+
+@event.listens_for(Venue, 'before_update')
+@event.listens_for(Artist, 'before_update')
+def _touch(mapper, connection, target):
+    target.updated_at = datetime.datetime.utcnow()
@@ -0,0 +1,92 @@
+#----------------------------------------------------------------------------#
+# Keyset (cursor) pagination.
+#
+# Pages are addressed by the sort key of their first or last row instead of an
+# OFFSET, so every page costs one indexed range scan no matter how deep it is.
+#----------------------------------------------------------------------------#
+
+import base64
+import datetime
+import json
+from collections import namedtuple
+
+from flask import abort, current_app, request
+from sqlalchemy import and_, or_
+from sqlalchemy.types import DateTime
+
+# etag / last_modified are filled in by the caller from the rows on the page
+Page = namedtuple('Page', ['items', 'limit', 'prev_cursor', 'next_cursor',
+                           'etag', 'last_modified'], defaults=(None, None))
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, datetime.datetime)
+              else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    # Malformed or tampered cursors are a client error
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if len(values) != len(columns):
+            raise ValueError(cursor)
+        return [datetime.datetime.fromisoformat(value)
+                if isinstance(column.type, DateTime) else value
+                for column, value in zip(columns, values)]
+    except (TypeError, ValueError):
+        abort(400)
+
+
+def keyset_filter(columns, values, reverse=False):
+    # (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which every
+    # backend can answer from a composite index
+    column, value = columns[0], values[0]
+    beyond = column < value if reverse else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(
+        column == value, keyset_filter(columns[1:], values[1:], reverse)))
+
+
+def paginate(query, columns, after=None, before=None, limit=50):
+    # Rows must expose every sort column under its own key (row.name, row.id)
+    if before:
+        query = query.filter(
+            keyset_filter(columns, decode_cursor(before, columns), reverse=True)
+        ).order_by(*[column.desc() for column in columns])
+    else:
+        if after:
+            query = query.filter(
+                keyset_filter(columns, decode_cursor(after, columns)))
+        query = query.order_by(*columns)
+
+    # Fetch one extra row to know whether there is another page
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before:
+        rows.reverse()
+
+    def cursor(row):
+        return encode_cursor([getattr(row, column.key) for column in columns])
+
+    has_prev = has_more if before else bool(after)
+    has_next = bool(before) or has_more
+    return Page(
+        items=rows,
+        limit=limit,
+        prev_cursor=cursor(rows[0]) if rows and has_prev else None,
+        next_cursor=cursor(rows[-1]) if rows and has_next else None)
+
+
+def page_args():
+    # Read the cursor and page size from the query string, capping the size
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type=int)
+    return {
+        'after': request.args.get('after'),
+        'before': request.args.get('before'),
+        'limit': max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    }
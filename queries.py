@@ -0,0 +1,408 @@
+#----------------------------------------------------------------------------#
+# Read queries used by the controllers.
+#
+# Every page keeps a fixed query budget: the number of SQL statements it runs
+# must not grow with the number of venues, artists or shows.
+#----------------------------------------------------------------------------#
+
+import bisect
+import datetime
+from collections import namedtuple
+from itertools import groupby
+
+from sqlalchemy import and_, func, or_
+
+from models import (
+    db, Venue, Show, Artist, Genre, venue_genres, artist_genres,
+    MAX_SHOW_DURATION)
+from conditional import make_etag
+from pagination import decode_cursor, keyset_filter, paginate
+
+
+Detail = namedtuple('Detail', ['data', 'etag', 'last_modified'])
+
+
+def versioned(page, kind, versions):
+    # Fill in the page validators from the (id, updated_at, ...) tuple of every
+    # row on the page; the cursors catch rows added after the last page
+    stamps = [stamp for version in versions for stamp in version[1:] if stamp]
+    return page._replace(
+        etag=make_etag(kind, page.limit, page.prev_cursor, page.next_cursor,
+                       versions),
+        last_modified=max(stamps) if stamps else None)
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+def venue_areas_query():
+    # One row per venue with its maintained upcoming show counter, so the
+    # listing never touches the Show table
+    return db.session.query(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.updated_at,
+        func.coalesce(Venue.num_upcoming_shows, 0).label('num_upcoming_shows'))
+
+
+# Venues are listed area by area; ix_Venue_state_city_name_id serves the order
+VENUE_AREA_ORDER = (Venue.state, Venue.city, Venue.name, Venue.id)
+
+
+def venue_areas(after=None, before=None, limit=50):
+    # Query budget: 1 statement, whatever the number of venues or areas.
+    # Venues are paged in area order, so an area's venues stay together and
+    # only the areas at the edges of a page continue on the next one.
+    page = paginate(venue_areas_query(), VENUE_AREA_ORDER,
+                    after, before, limit)
+
+    areas = []
+    for (city, state), venues in groupby(
+            page.items, key=lambda row: (row.city, row.state)):
+        areas.append({
+            'city': city,
+            'state': state,
+            'venues': [{
+                'id': venue.id,
+                'name': venue.name,
+                'num_upcoming_shows': venue.num_upcoming_shows,
+                'updated_at': venue.updated_at
+            } for venue in venues]
+        })
+    page = versioned(page, 'venues',
+                     [(row.id, row.updated_at) for row in page.items])
+    return page._replace(items=areas)
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+def artist_listing(after=None, before=None, limit=50):
+    # Query budget: 1 statement, whatever the number of artists.
+    page = paginate(
+        db.session.query(Artist.id, Artist.name, Artist.updated_at),
+        (Artist.name, Artist.id), after, before, limit)
+    page = versioned(page, 'artists',
+                     [(row.id, row.updated_at) for row in page.items])
+    return page._replace(items=[{
+        'id': artist.id,
+        'name': artist.name,
+        'updated_at': artist.updated_at,
+    } for artist in page.items])
+
+
+#  Venue and artist detail pages
+#  ----------------------------------------------------------------
+
+VENUE_FIELDS = (
+    'id', 'name', 'address', 'genres', 'city', 'state', 'phone',
+    'website_link', 'facebook_link', 'seeking_talent',
+    'seeking_description', 'image_link')
+
+ARTIST_FIELDS = (
+    'id', 'name', 'genres', 'city', 'state', 'phone', 'website_link',
+    'facebook_link', 'seeking_venue', 'seeking_description', 'image_link')
+
+
+def venue_detail_query(venue_id):
+    # The venue and every one of its shows with the artist name and image,
+    # eager-joined into one statement
+    return db.session.query(
+        Venue,
+        Show.start_time,
+        Show.updated_at.label('show_updated_at'),
+        Artist.id.label('counterpart_id'),
+        Artist.name.label('counterpart_name'),
+        Artist.image_link.label('counterpart_image_link'),
+        Artist.updated_at.label('counterpart_updated_at')
+    ).outerjoin(
+        Show, Show.venue_id == Venue.id
+    ).outerjoin(
+        Artist, Artist.id == Show.artist_id
+    ).filter(
+        Venue.id == venue_id
+    ).order_by(Show.start_time)
+
+
+def artist_detail_query(artist_id):
+    # The artist and every one of its shows with the venue name and image,
+    # eager-joined into one statement
+    return db.session.query(
+        Artist,
+        Show.start_time,
+        Show.updated_at.label('show_updated_at'),
+        Venue.id.label('counterpart_id'),
+        Venue.name.label('counterpart_name'),
+        Venue.image_link.label('counterpart_image_link'),
+        Venue.updated_at.label('counterpart_updated_at')
+    ).outerjoin(
+        Show, Show.artist_id == Artist.id
+    ).outerjoin(
+        Venue, Venue.id == Show.venue_id
+    ).filter(
+        Artist.id == artist_id
+    ).order_by(Show.start_time)
+
+
+def build_detail(entity, fields, rows, counterpart, now):
+    # Build the detail page dict, splitting the shows into past and upcoming
+    # in a single pass against the same "now", along with its validators
+    data = {field: getattr(entity, field) for field in fields}
+    stamps = [entity.updated_at]
+    versions = []
+    data['genres'] = [genre.name for genre in entity.genres]
+
+    upcoming_shows = []
+    past_shows = []
+    for row in rows:
+        # A venue or artist without shows still comes back as one row
+        if row.start_time is None:
+            continue
+        stamps += [row.show_updated_at, row.counterpart_updated_at]
+        versions.append((row.counterpart_id, row.start_time,
+                         row.show_updated_at, row.counterpart_updated_at))
+        show = {
+            counterpart + '_id': row.counterpart_id,
+            counterpart + '_name': row.counterpart_name,
+            counterpart + '_image_link': row.counterpart_image_link,
+            'start_time': row.start_time
+        }
+        if row.start_time >= now:
+            upcoming_shows.append(show)
+        else:
+            past_shows.append(show)
+            # The page changed when the show started; stamps are UTC and
+            # start times local
+            stamps.append(row.start_time.astimezone(
+                datetime.timezone.utc).replace(tzinfo=None))
+
+    data['upcoming_shows'] = upcoming_shows
+    data['past_shows'] = past_shows
+    data['upcoming_shows_count'] = len(upcoming_shows)
+    data['past_shows_count'] = len(past_shows)
+
+    # The upcoming/past split is part of the version: a show starting makes
+    # the page change without any row being written, so both the ETag and
+    # Last-Modified (through the start times above) move with it
+    last_modified = max(stamp for stamp in stamps if stamp)
+    etag = make_etag(counterpart, entity.id, entity.updated_at,
+                     data['genres'], len(upcoming_shows), versions)
+    return Detail(data, etag, last_modified)
+
+
+def venue_detail(venue_id, now=None):
+    # Query budget: 2 statements (venue with shows, then its genres), whatever
+    # the number of shows.
+    now = now or datetime.datetime.now()
+    rows = venue_detail_query(venue_id).all()
+    if not rows:
+        return None
+    return build_detail(rows[0][0], VENUE_FIELDS, rows, 'artist', now)
+
+
+def artist_detail(artist_id, now=None):
+    # Query budget: 2 statements (artist with shows, then its genres),
+    # whatever the number of shows.
+    now = now or datetime.datetime.now()
+    rows = artist_detail_query(artist_id).all()
+    if not rows:
+        return None
+    return build_detail(rows[0][0], ARTIST_FIELDS, rows, 'venue', now)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+def shows_query():
+    # Show joined to Artist and Venue, selecting only the columns the
+    # listing renders plus the show id used as the page cursor and the
+    # timestamps behind the page validators
+    return db.session.query(
+        Show.id,
+        Show.updated_at,
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.start_time,
+        Artist.updated_at.label('artist_updated_at'),
+        Venue.updated_at.label('venue_updated_at')
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    ).join(
+        Venue, Venue.id == Show.venue_id)
+
+
+def show_listing(after=None, before=None, limit=50):
+    # Query budget: 1 statement, whatever the number of shows.
+    page = paginate(shows_query(), (Show.start_time, Show.id),
+                    after, before, limit)
+    page = versioned(page, 'shows', [
+        (show.id, show.updated_at, show.artist_updated_at,
+         show.venue_updated_at) for show in page.items])
+    return page._replace(items=[{
+        'id': show.id,
+        # The item also renders the artist and venue, so it changes with them
+        'updated_at': max(show.updated_at, show.artist_updated_at,
+                          show.venue_updated_at),
+        'artist_id': show.artist_id,
+        'artist_name': show.artist_name,
+        'artist_image_link': show.artist_image_link,
+        'venue_id': show.venue_id,
+        'venue_name': show.venue_name,
+        'start_time': show.start_time
+    } for show in page.items])
+
+
+#  Bookings
+#  ----------------------------------------------------------------
+
+def venue_bookings(windows):
+    # The shows that may overlap any of the (venue_id, start, end) windows:
+    # those at the venue starting in (start - MAX_SHOW_DURATION, end). Each
+    # window is one range scan of ix_Show_venue_id_start_time.
+    return db.session.query(
+        Show.id, Show.venue_id, Show.start_time, Show.duration_minutes
+    ).filter(or_(*[
+        and_(Show.venue_id == venue_id,
+             Show.start_time > start - MAX_SHOW_DURATION,
+             Show.start_time < end)
+        for venue_id, start, end in windows
+    ])).order_by(Show.venue_id, Show.start_time)
+
+
+def booking(show):
+    # (start, end, id) of a show row
+    return (show.start_time,
+            show.start_time + datetime.timedelta(minutes=show.duration_minutes),
+            show.id)
+
+
+def find_overlap(bookings, start, end):
+    # The first booking sharing time with [start, end), bookings being
+    # (start, end, ...) tuples sorted by start
+    index = bisect.bisect_right(bookings, (start - MAX_SHOW_DURATION,))
+    while index < len(bookings) and bookings[index][0] < end:
+        if bookings[index][1] > start:
+            return bookings[index]
+        index += 1
+    return None
+
+
+def venue_conflict(venue_id, start_time, duration_minutes):
+    # Query budget: 1 statement. The (start, end, id) of a show at the venue
+    # overlapping the given slot, if any.
+    end_time = start_time + datetime.timedelta(minutes=duration_minutes)
+    bookings = [booking(show) for show in
+                venue_bookings([(venue_id, start_time, end_time)])]
+    return find_overlap(bookings, start_time, end_time)
+
+
+def availability_query(venue_ids, start, end):
+    # Every venue of venue_ids (a list or a subquery) with its shows that may
+    # overlap [start, end), in one statement; a venue without any comes back
+    # once with NULL show columns
+    return db.session.query(
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Show.id,
+        Show.start_time,
+        Show.duration_minutes
+    ).outerjoin(Show, and_(
+        Show.venue_id == Venue.id,
+        Show.start_time > start - MAX_SHOW_DURATION,
+        Show.start_time < end)
+    ).filter(
+        Venue.id.in_(venue_ids)
+    ).order_by(Venue.name, Venue.id, Show.start_time)
+
+
+CITY_VENUE_ORDER = (Venue.name, Venue.id)
+
+
+def city_venue_ids(city, state, after=None, limit=50):
+    # Subquery of the venues of a city by (name, id) after the cursor; one
+    # more than limit, so the caller can tell whether another page follows
+    query = db.session.query(Venue.id).filter(
+        Venue.state == state, Venue.city == city)
+    if after:
+        query = query.filter(keyset_filter(
+            CITY_VENUE_ORDER, decode_cursor(after, CITY_VENUE_ORDER)))
+    return query.order_by(*CITY_VENUE_ORDER).limit(limit + 1).subquery()
+
+
+#  Genres
+#  ----------------------------------------------------------------
+
+def genre_venues_query(genre):
+    return db.session.query(
+        Venue.id, Venue.name
+    ).join(
+        venue_genres, venue_genres.c.venue_id == Venue.id
+    ).join(
+        Genre, Genre.id == venue_genres.c.genre_id
+    ).filter(Genre.name == genre).order_by(Venue.name, Venue.id)
+
+
+def genre_artists_query(genre):
+    return db.session.query(
+        Artist.id, Artist.name
+    ).join(
+        artist_genres, artist_genres.c.artist_id == Artist.id
+    ).join(
+        Genre, Genre.id == artist_genres.c.genre_id
+    ).filter(Genre.name == genre).order_by(Artist.name, Artist.id)
+
+
+def genre_shows_query(genre, now):
+    # Upcoming shows whose artist plays the genre
+    return shows_query().join(
+        artist_genres, artist_genres.c.artist_id == Show.artist_id
+    ).join(
+        Genre, Genre.id == artist_genres.c.genre_id
+    ).filter(
+        Genre.name == genre,
+        Show.start_time >= now
+    ).order_by(Show.start_time, Show.id)
+
+
+def genre_browse(genre, limit=50, now=None):
+    # Query budget: 3 statements, each answered from the genre indexes.
+    now = now or datetime.datetime.now()
+    return {
+        'genre': genre,
+        'venues': [{
+            'id': venue.id,
+            'name': venue.name
+        } for venue in genre_venues_query(genre).limit(limit)],
+        'artists': [{
+            'id': artist.id,
+            'name': artist.name
+        } for artist in genre_artists_query(genre).limit(limit)],
+        'upcoming_shows': [{
+            'artist_id': show.artist_id,
+            'artist_name': show.artist_name,
+            'artist_image_link': show.artist_image_link,
+            'venue_id': show.venue_id,
+            'venue_name': show.venue_name,
+            'start_time': show.start_time
+        } for show in genre_shows_query(genre, now).limit(limit)]
+    }
+
+
+#  Cache invalidation
+#  ----------------------------------------------------------------
+
+def venue_artist_ids(venue_id):
+    # Artists whose pages show this venue
+    return [row.artist_id for row in db.session.query(
+        Show.artist_id).filter(Show.venue_id == venue_id).distinct()]
+
+
+def artist_venue_ids(artist_id):
+    # Venues whose pages show this artist
+    return [row.venue_id for row in db.session.query(
+        Show.venue_id).filter(Show.artist_id == artist_id).distinct()]
@@ -0,0 +1,126 @@
+#----------------------------------------------------------------------------#
+# Indexed substring search for venues and artists.
+#
+# On Postgres the ILIKE filters are answered by the pg_trgm GIN indexes created
+# in migration 8d41a7c3e2f9. On SQLite the same migration creates FTS5 trigram
+# shadow tables (venue_fts, artist_fts) kept in sync by triggers, and terms of
+# three characters or more are matched through them.
+#----------------------------------------------------------------------------#
+
+from sqlalchemy import and_, func, or_, text
+
+from models import db, Venue, Artist
+
+FTS_TABLES = {
+    Venue: 'venue_fts',
+    Artist: 'artist_fts',
+}
+
+# The trigram tokenizer cannot match anything shorter than one trigram
+FTS_MIN_LENGTH = 3
+
+# Engines whose database has the FTS5 shadow tables, by engine url
+_fts_available = {}
+
+
+def fts_available():
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+    key = str(engine.url)
+    if key not in _fts_available:
+        found = engine.execute(text(
+            "SELECT count(*) FROM sqlite_master "
+            "WHERE type = 'table' AND name IN ('venue_fts', 'artist_fts')"
+        )).scalar()
+        _fts_available[key] = found == len(FTS_TABLES)
+    return _fts_available[key]
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def match(model, columns, value):
+    # Clause matching value as a case-insensitive substring of any of columns
+    if fts_available() and len(value) >= FTS_MIN_LENGTH:
+        table = FTS_TABLES[model]
+        phrase = '"' + value.replace('"', '""') + '"'
+        # One bind name per column set so a city and a state match can sit in
+        # the same statement
+        param = 'fts_' + '_'.join(columns)
+        return model.id.in_(text(
+            'SELECT rowid FROM %s WHERE %s MATCH :%s' % (table, table, param)
+        ).bindparams(**{param: '{%s}: %s' % (' '.join(columns), phrase)}))
+
+    pattern = '%' + escape_like(value) + '%'
+    return or_(*[getattr(model, column).ilike(pattern, escape='\\')
+                 for column in columns])
+
+
+def search_filter(model, search_term):
+    # "San Francisco, CA" searches by city and state; anything else matches the
+    # name, city or state
+    if ',' in search_term:
+        city, state = [part.strip() for part in search_term.rsplit(',', 1)]
+        clauses = []
+        if city:
+            clauses.append(match(model, ['city'], city))
+        if state:
+            clauses.append(match(model, ['state'], state))
+        return and_(*clauses)
+    return match(model, ['name', 'city', 'state'], search_term)
+
+
+def search(model, search_term, limit=50):
+    # Query budget: 1 statement. The total number of matches comes back with
+    # every row through a window function, so the results and their count
+    # come from the same execution.
+    search_term = search_term.strip()
+
+    query = db.session.query(
+        model.id,
+        model.name,
+        func.coalesce(model.num_upcoming_shows, 0).label('num_upcoming_shows'),
+        func.count().over().label('total'))
+    if search_term:
+        query = query.filter(search_filter(model, search_term))
+    rows = query.order_by(model.name, model.id).limit(limit).all()
+
+    return {
+        'count': rows[0].total if rows else 0,
+        'data': [{
+            'id': row.id,
+            'name': row.name,
+            'num_upcoming_shows': row.num_upcoming_shows
+        } for row in rows]
+    }
+
+
+def search_venues(search_term, limit=50):
+    return search(Venue, search_term, limit)
+
+
+def search_artists(search_term, limit=50):
+    return search(Artist, search_term, limit)
+
+
+def rebuild():
+    # Repopulate the SQLite shadow tables from their content tables
+    if not fts_available():
+        return False
+    for table in FTS_TABLES.values():
+        db.session.execute(text(
+            "INSERT INTO %s(%s) VALUES('rebuild')" % (table, table)))
+    db.session.commit()
+    return True
+
+
+def init_app(app):
+    @app.cli.command('search-rebuild')
+    def search_rebuild_command():
+        """Rebuild the SQLite full-text search tables."""
+        if rebuild():
+            print('Search index rebuilt.')
+        else:
+            print('No full-text search tables to rebuild on this database.')
@@ -0,0 +1,241 @@
+#----------------------------------------------------------------------------#
+# Secret key and server-side sessions.
+#
+# Every worker must sign sessions and CSRF tokens with the same key. It comes
+# from the SECRET_KEY environment variable; without one, a key is generated
+# once into the instance folder and shared by the processes on this host.
+#
+# SESSION_BACKEND picks where session data lives:
+#   'cookie'     -- Flask's signed cookie (default)
+#   'filesystem' -- one file per session in SESSION_FILE_DIR
+#   'sqlite'     -- a table in the SESSION_SQLITE_PATH database
+#   'redis'      -- shared by every host, needs the redis package
+# With a server-side backend the cookie only carries a random session id.
+#----------------------------------------------------------------------------#
+
+import contextlib
+import os
+import re
+import secrets
+import sqlite3
+import tempfile
+import time
+
+import click
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+from cache import RedisCache
+
+# secrets.token_urlsafe(32); anything else in the cookie is ignored
+SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+
+class FileSessionStore(object):
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, sid):
+        path = os.path.join(self.directory, sid)
+        # A truncated or corrupt file is a missing session
+        try:
+            with open(path) as source:
+                expires_at, value = source.read().split('\n', 1)
+            expires_at = float(expires_at)
+        except (IOError, ValueError):
+            return None
+        if expires_at < time.time():
+            self.delete(sid)
+            return None
+        return value
+
+    def set(self, sid, value, timeout):
+        # Written aside and renamed so readers never see half a session
+        fd, path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w') as out:
+            out.write('{}\n{}'.format(time.time() + timeout, value))
+        os.replace(path, os.path.join(self.directory, sid))
+
+    def delete(self, sid):
+        try:
+            os.remove(os.path.join(self.directory, sid))
+        except OSError:
+            pass
+
+    def purge(self):
+        count = 0
+        for sid in os.listdir(self.directory):
+            if SESSION_ID.match(sid) and self.get(sid) is None:
+                count += 1
+        return count
+
+
+class SQLiteSessionStore(object):
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS session ('
+                'id TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'expires_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_session_expires_at '
+                         'ON session (expires_at)')
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One connection per call, since sqlite3 connections are not shared
+        # between threads. The connection's own context manager only commits,
+        # so it is closed here as well.
+        with contextlib.closing(sqlite3.connect(self.path, timeout=10)) as conn:
+            with conn:
+                yield conn
+
+    def get(self, sid):
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT value FROM session WHERE id = ? AND expires_at >= ?',
+                (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, value, timeout):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO session (id, value, expires_at) '
+                'VALUES (?, ?, ?)', (sid, value, time.time() + timeout))
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM session WHERE id = ?', (sid,))
+
+    def purge(self):
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM session WHERE expires_at < ?',
+                                (time.time(),)).rowcount
+
+
+class RedisSessionStore(RedisCache):
+    # Redis expires the keys itself
+
+    def __init__(self, url):
+        super().__init__(url, prefix='fyyur:session:')
+
+    def delete(self, sid):
+        self.delete_many([sid])
+
+    def purge(self):
+        return 0
+
+
+class ServerSession(SecureCookieSession):
+
+    def __init__(self, initial=None, sid=None, new=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+
+
+class ServerSessionInterface(SessionInterface):
+    # Session data in a store, keyed by a random id kept in the cookie
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(app.session_cookie_name)
+        if sid and SESSION_ID.match(sid):
+            value = self.store.get(sid)
+            if value is not None:
+                try:
+                    return ServerSession(self.serializer.loads(value), sid)
+                except ValueError:
+                    pass
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(app.session_cookie_name,
+                                       domain=domain, path=path)
+            return
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not self.should_set_cookie(app, session):
+            return
+        if session.modified:
+            self.store.set(
+                session.sid, self.serializer.dumps(dict(session)),
+                app.permanent_session_lifetime.total_seconds())
+        response.set_cookie(
+            app.session_cookie_name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain, path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app))
+
+
+def create_store(app):
+    config = app.config
+    backend = config['SESSION_BACKEND']
+    if backend == 'filesystem':
+        return FileSessionStore(config['SESSION_FILE_DIR'] or os.path.join(
+            app.instance_path, 'sessions'))
+    if backend == 'sqlite':
+        os.makedirs(app.instance_path, exist_ok=True)
+        return SQLiteSessionStore(config['SESSION_SQLITE_PATH'] or
+                                  os.path.join(app.instance_path,
+                                               'sessions.db'))
+    if backend == 'redis':
+        return RedisSessionStore(config['SESSION_REDIS_URL'])
+    raise ValueError('Unknown SESSION_BACKEND {!r}'.format(backend))
+
+
+def load_secret_key(app):
+    # The instance key file is created once, atomically, so processes
+    # starting together still agree on one key
+    path = os.path.join(app.instance_path, 'secret_key')
+    os.makedirs(app.instance_path, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, 'w') as out:
+            out.write(secrets.token_hex(32))
+    # A process that lost the race may read before the winner has written
+    for _ in range(50):
+        with open(path) as source:
+            key = source.read().strip()
+        if key:
+            return key
+        time.sleep(0.01)
+    raise RuntimeError('{} is empty'.format(path))
+
+
+def init_app(app):
+    if not app.config['SECRET_KEY']:
+        app.config['SECRET_KEY'] = load_secret_key(app)
+        if not app.debug:
+            app.logger.warning(
+                'SECRET_KEY is not set; using the key in the instance '
+                'folder, which only processes on this host share')
+
+    if app.config['SESSION_BACKEND'] != 'cookie':
+        app.session_interface = ServerSessionInterface(create_store(app))
+
+    @app.cli.command('sessions-purge')
+    def sessions_purge_command():
+        """Delete the expired server-side sessions."""
+        if not isinstance(app.session_interface, ServerSessionInterface):
+            raise click.ClickException('SESSION_BACKEND is cookie')
+        click.echo('{} expired sessions deleted'.format(
+            app.session_interface.store.purge()))
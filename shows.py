@@ -0,0 +1,175 @@
+#----------------------------------------------------------------------------#
+# Show pages: listing, create and batch create.
+#----------------------------------------------------------------------------#
+
+import csv
+
+from flask import (Blueprint, current_app, flash, redirect, render_template,
+                   url_for)
+from sqlalchemy.exc import IntegrityError
+
+import cache
+import conditional
+import database
+import importer
+import queries
+from forms import ShowBatchForm, ShowForm
+from models import db, Show
+from pagination import page_args
+
+blueprint = Blueprint('shows', __name__)
+
+
+@blueprint.route('/shows')
+@database.read_only
+def shows():
+    # displays list of shows at /shows
+
+    # Get one page of shows with their artist and venue in one joined query
+    page = queries.show_listing(**page_args())
+    # Answer 304 from the row timestamps before rendering anything
+    not_modified = conditional.validate(page.etag, page.last_modified)
+    if not_modified is not None:
+        return not_modified
+    return render_template('pages/shows.html', shows=page.items, page=page)
+
+
+@blueprint.route('/shows/create')
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+@blueprint.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    # called to create new shows in the db, upon submitting new show listing form
+
+    # Form Validation
+    form = ShowForm()
+    valid = form.validate()
+    if valid:
+        # The venue must be free for the whole show; one indexed range query
+        conflict = queries.venue_conflict(
+            int(form.venue_id.data), form.start_time.data,
+            form.duration_minutes.data)
+        if conflict:
+            form.start_time.errors.append(
+                'The venue is already booked from {} to {}'.format(
+                    *conflict[:2]))
+            valid = False
+    if not valid:
+        for fieldName, errorMessages in form.errors.items():
+            flash(errorMessages)
+        return redirect(url_for('.create_shows'))
+
+    # Get the required data to create new show from the form
+    new_Show = Show(
+        artist_id=form.artist_id.data,
+        venue_id=form.venue_id.data,
+        start_time=form.start_time.data,
+        duration_minutes=form.duration_minutes.data
+    )
+    try:
+        # Add the new show to db
+        Show.create(new_Show)
+        cache.invalidate(venue_ids=[int(form.venue_id.data)],
+                         artist_ids=[int(form.artist_id.data)])
+        # on successful db insert, flash success
+        flash('Show was successfully listed!')
+    except IntegrityError as error:
+        db.session.rollback()
+        # 23P01: a concurrent booking of the same slot won the race to the
+        # Postgres exclusion constraint
+        if getattr(error.orig, 'pgcode', None) == '23P01':
+            flash('The venue was booked for that time in the meantime.')
+            return redirect(url_for('.create_shows'))
+        flash('An error occurred. Show could not be listed.')
+    except BaseException:
+        db.session.rollback()
+        # TODO: on unsuccessful db insert, flash an error instead.
+        flash('An error occurred. Show could not be listed.')
+        # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    finally:
+        db.session.close()
+    return render_template('pages/home.html')
+
+
+#  Batch create
+#  ----------------------------------------------------------------
+
+BATCH_COLUMNS = ('artist_id', 'venue_id', 'start_time', 'duration_minutes')
+
+
+def batch_records(text):
+    # (line number, row) of every non-blank line, and the rejects of the
+    # lines without three or four values
+    records, rejects = [], []
+    for number, cells in enumerate(csv.reader(text.splitlines()), start=1):
+        cells = [cell.strip() for cell in cells]
+        if not any(cells):
+            continue
+        if len(cells) not in (3, 4):
+            rejects.append((number, {'row': [
+                'expected artist_id, venue_id, start_time[, duration_minutes]'
+            ]}))
+            continue
+        records.append((number, dict(zip(BATCH_COLUMNS, cells))))
+    return records, rejects
+
+
+def create_batch(records, rejects):
+    # Query budget: 6 statements for a valid batch of any size -- one IN
+    # query per table, the venue bookings, the insert and the two counter
+    # refreshes -- and no write at all when a row is rejected. Row number 0
+    # in rejects stands for the whole batch.
+    limit = current_app.config['SHOW_BATCH_MAX_ROWS']
+    if not records:
+        if not rejects:
+            rejects.append((0, {'row': ['no shows given']}))
+        return 0
+    if len(records) + len(rejects) > limit:
+        rejects.append((0, {'row': [
+            'at most {} shows per batch'.format(limit)]}))
+        return 0
+    try:
+        return importer.create_show_batch(records, rejects)
+    except IntegrityError as error:
+        db.session.rollback()
+        # 23P01: a concurrent booking won the race to the exclusion constraint
+        if getattr(error.orig, 'pgcode', None) != '23P01':
+            raise
+        rejects.append((0, {'start_time': [
+            'a venue was booked for one of the times in the meantime']}))
+        return 0
+    finally:
+        db.session.close()
+
+
+@blueprint.route('/shows/batch')
+def create_show_batch():
+    form = ShowBatchForm()
+    return render_template('forms/new_shows.html', form=form, rejects=[])
+
+
+@blueprint.route('/shows/batch', methods=['POST'])
+def create_show_batch_submission():
+    # Many shows from one form, all listed or none
+    form = ShowBatchForm()
+    if not form.validate():
+        for fieldName, errorMessages in form.errors.items():
+            flash(errorMessages)
+        return redirect(url_for('.create_show_batch'))
+
+    records, rejects = batch_records(form.shows.data)
+    created = create_batch(records, rejects)
+    if rejects:
+        # Keep the submitted lines so they can be corrected
+        return render_template('forms/new_shows.html', form=form,
+                               rejects=rejects), 422
+    flash('{} shows were successfully listed!'.format(created))
+    return render_template('pages/home.html')
+
+
+def init_app(app):
+    app.register_blueprint(blueprint)
@@ -0,0 +1,73 @@
+#----------------------------------------------------------------------------#
+# Template compilation and fragment caching.
+#
+# Compiled templates are kept in an on-disk bytecode cache shared by the
+# workers, so a new worker loads them instead of compiling the sources. The
+# {% cache %} tag stores the HTML of a block in an in-process LRU under the
+# values it is given; listings key each item by entity id and updated_at:
+#
+#   {% cache 'venue', venue.id, venue.updated_at %} ... {% endcache %}
+#
+# A changed row gets a new key, so nothing has to be invalidated and stale
+# fragments just age out. FRAGMENT_CACHE_BACKEND = 'null' turns it off.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from cache import LRUCache, NullCache, PageCache
+
+
+def key_part(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cached_fragment', [nodes.List(parts)]),
+            [], [], body).set_lineno(lineno)
+
+    def _cached_fragment(self, parts, caller):
+        fragment_cache = current_app.extensions['fragment_cache']
+        key = ':'.join(key_part(part) for part in parts)
+        fragment = fragment_cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            fragment_cache.set(key, str(fragment))
+        # Cached HTML is already escaped
+        return Markup(fragment)
+
+
+def create_fragment_backend(config):
+    backend = config['FRAGMENT_CACHE_BACKEND']
+    if backend == 'lru':
+        return LRUCache(config['FRAGMENT_CACHE_MAX_ENTRIES'],
+                        config['FRAGMENT_CACHE_MAX_BYTES'])
+    if backend == 'null':
+        return NullCache()
+    raise ValueError('Unknown FRAGMENT_CACHE_BACKEND {!r}'.format(backend))
+
+
+def init_app(app):
+    if app.config['JINJA_BYTECODE_CACHE']:
+        # None picks a per-user directory under the system temp dir
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+            app.config['JINJA_BYTECODE_CACHE_DIR'])
+    app.extensions['fragment_cache'] = PageCache(
+        create_fragment_backend(app.config),
+        app.config['FRAGMENT_CACHE_TIMEOUT'])
+    app.jinja_env.add_extension(FragmentCacheExtension)
@@ -0,0 +1,235 @@
+#----------------------------------------------------------------------------#
+# Venue pages: listing, search, detail, create, edit and delete.
+#----------------------------------------------------------------------------#
+
+from flask import (Blueprint, current_app, flash, redirect, render_template,
+                   request, url_for)
+
+import cache
+import conditional
+import counters
+import database
+import queries
+import search
+from forms import VenueForm
+from models import db, Genre, Show, Venue
+from pagination import page_args
+
+blueprint = Blueprint('venues', __name__)
+
+
+@blueprint.route('/venues')
+@database.read_only
+def venues():
+    # Get the venues grouped by state and city with their number of upcoming
+    # shows, one page at a time from a single query
+    page = queries.venue_areas(**page_args())
+    # Answer 304 from the row timestamps before rendering anything
+    not_modified = conditional.validate(page.etag, page.last_modified)
+    if not_modified is not None:
+        return not_modified
+    return render_template('pages/venues.html', areas=page.items, page=page)
+
+
+@blueprint.route('/venues/search', methods=['POST'])
+@database.read_only
+def search_venues():
+    # Get the matching venues and their count from one indexed query
+    search_term = request.form.get('search_term', '')
+    response = search.search_venues(
+        search_term, limit=current_app.config['PAGE_SIZE'])
+    return render_template('pages/search_venues.html', results=response,
+                           search_term=request.form.get('search_term', ''))
+
+
+@blueprint.route('/venues/<int:venue_id>')
+@database.read_only
+@cache.cached_page('venue', 'venue_id')
+def show_venue(venue_id):
+    # shows the venue page with the given venue_id
+
+    # Get the venue and all of its shows in one query
+    detail = queries.venue_detail(venue_id)
+
+    # Check if the object exixt or not
+    if not detail:
+        return render_template('errors/404.html')
+
+    # Answer 304 from the row timestamps before rendering anything
+    not_modified = conditional.validate(detail.etag, detail.last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    # Cache the page until its first upcoming show starts
+    upcoming = detail.data['upcoming_shows']
+    cache.store_page(until=upcoming[0]['start_time'] if upcoming else None)
+    return render_template('pages/show_venue.html', venue=detail.data)
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+
+@blueprint.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@blueprint.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    # TODO: insert form data as a new Venue record in the db, instead
+    # TODO: modify data to be the data object returned from db insertion
+
+    # Form Validation 
+    form = VenueForm()
+    if not form.validate():
+      for fieldName, errorMessages in form.errors.items():
+       flash(errorMessages)
+      return redirect(url_for('.create_venue_form'))
+
+    # Get the required data to create a new venue from the form
+    name = request.form['name']
+    city = request.form['city']
+    state = request.form['state']
+    address = request.form['address']
+    phone = request.form['phone']
+    genres = Genre.lookup(request.form.getlist('genres'))
+    image_link = request.form['image_link']
+    facebook_link = request.form['facebook_link']
+    website_link = request.form['website_link']
+    seeking_talent = True if 'seeking_talent' in request.form else False
+    seeking_description = request.form['seeking_description']
+
+    new_Venue = Venue(
+        name=name,
+        city=city,
+        state=state,
+        address=address,
+        phone=phone,
+        genres=genres,
+        image_link=image_link,
+        facebook_link=facebook_link,
+        website_link=website_link,
+        seeking_talent=seeking_talent,
+        seeking_description=seeking_description,
+    )
+
+    
+     # on successful db insert, flash success
+    try:
+        # Add data to a venue model
+        Venue.create(new_Venue)
+        flash('Venue ' + request.form['name'] + ' was added successfully!')
+        # TODO: on unsuccessful db insert, flash an error instead.
+    except BaseException:
+        db.session.rollback()
+        flash(
+            'An error occurred. Venue ' +
+            request.form['name'] +
+            ' could not be added!')
+    finally:
+        db.session.close()
+
+    return render_template('pages/home.html')
+
+
+@blueprint.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    # TODO: Complete this endpoint for taking a venue_id, and using
+    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+    # Get the venue by given id
+    venue = Venue.query.filter_by(id=venue_id).first()
+    # Get the artists whose pages show this venue before it is gone
+    artist_ids = queries.venue_artist_ids(venue_id)
+    try:
+        # Drop the venue's shows in one DELETE and recount their artists once;
+        # the ORM cascade would run two counter UPDATEs per show
+        Show.query.filter_by(venue_id=venue.id).delete(
+            synchronize_session=False)
+        counters.refresh(artist_ids=artist_ids)
+        # Delete the venue from db
+        Venue.delete(venue)
+        cache.invalidate(venue_ids=[venue_id], artist_ids=artist_ids)
+
+        flash(venue.name + 'venue was deleted successfully!')
+    except BaseException:
+        db.session.rollback()
+        flash(venue.name + "venue was n't deleted successfully!")
+    finally:
+        db.session.close()
+    # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+    # clicking that button delete it from the db then redirect the user to the
+    # homepage
+    return render_template('pages/home.html')
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    # Get the venue by the given id
+    venue = Venue.query.get(venue_id)
+    # Fill venue data in the form
+    form = VenueForm()
+    form.name.data = venue.name
+    form.city.data = venue.city
+    form.state.data = venue.state
+    form.address.data = venue.address
+    form.phone.data = venue.phone
+    form.image_link.data = venue.image_link
+    form.genres.data = [genre.name for genre in venue.genres]
+    form.facebook_link.data = venue.facebook_link
+    form.website_link.data = venue.website_link
+    form.seeking_talent.data = venue.seeking_talent
+    form.seeking_description.data = venue.seeking_description
+
+    # TODO: populate form with values from venue with ID <venue_id>
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    # TODO: take values from the form submitted, and update existing
+    # venue record with ID <venue_id> using the new attributes
+
+    # Form Validation 
+    form = VenueForm()
+    if not form.validate():
+     for fieldName, errorMessages in form.errors.items():
+       flash(errorMessages)
+     return redirect(url_for('.edit_venue', venue_id=venue_id))
+
+    # Get the venue by the given id
+    venue = Venue.query.get(venue_id)
+    # Update venue data
+    try:
+        venue.name = request.form['name']
+        venue.city = request.form['city']
+        venue.state = request.form['state']
+        venue.address = request.form['address']
+        venue.phone = request.form['phone']
+        venue.image_link = request.form['image_link']
+        venue.genres = Genre.lookup(request.form.getlist('genres'))
+        venue.facebook_link = request.form['facebook_link']
+        venue.website_link = request.form['website_link']
+        venue.seeking_talent = True if 'seeking_talent' in request.form else False
+        venue.seeking_description = request.form['seeking_description']
+
+        Venue.update(venue)
+        # Drop the cached pages that show this venue
+        cache.invalidate(venue_ids=[venue_id],
+                         artist_ids=queries.venue_artist_ids(venue_id))
+        flash(" {} info was updated successfully!".format(venue.name))
+    except BaseException:
+        db.session.rollback()
+        flash(" {} info wasn't updated successfully!".format(venue.name))
+    finally:
+        db.session.close()
+    return redirect(url_for('.show_venue', venue_id=venue_id))
+
+
+def init_app(app):
+    app.register_blueprint(blueprint)